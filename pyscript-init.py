@@ -9,15 +9,47 @@ requirements:
 
 run `pyscript-init.py --help` for usage
 run `pyscript-init.py --dry-run` to see what actions would be run by default
+run `pyscript-init.py --manifest FILE` to provision envs declared in a toml manifest
+run `pyscript-init.py wheelhouse --help` for offline install support
+run `pyscript-init.py clone --help` to create an env from an existing one
+run `pyscript-init.py dedupe --help` to share identical files across envs
+run `pyscript-init.py pack --help` to archive an env for rollout to other hosts
 """
 
 import argparse
+import contextlib
+import datetime
+import fcntl
+import functools
+import gzip
+import hashlib
+import io
 import json
+import os
+import platform
+import re
 import shutil
+import struct
 import subprocess
 import sys
+import tarfile
+import tempfile
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
+# toml manifest support, stdlib from python 3.11 on
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib  # type: ignore
+    except ImportError:
+        tomllib = None  # type: ignore
+
 # environment dependency defaults
 primary_reqs_default = [
     "click==7.1.2",
@@ -29,6 +61,55 @@ build_reqs_default = [
     "flit-core==3.2.0",
 ]
 
+# environment creation defaults
+python_default = sys.base_prefix + "/bin/python3"
+virtualenv_flags_default = [
+    "--seeder",
+    "pip",
+    "--always-copy",
+    "--no-setuptools",
+    "--no-wheel",
+    "--no-vcs-ignore",
+]
+
+# local wheel store shared with pyscript-tools.py
+wheelhouse_default = "~/.cache/pyscript/wheelhouse"
+
+# per env record of what it was last provisioned with, see `env_fingerprint`
+stamp_name = ".pyscript-stamp.json"
+
+# progress of the last --manifest run, see `run_envs`
+state_name = ".pyscript-manifest-state.json"
+
+# hardlink store for files shared across all envs under a root directory
+store_name = ".pyscript-store"
+
+# pip log lines marking the start of each pip phase, see `PipPhaseTimer`
+pip_phase_markers = [
+    (
+        "download",
+        re.compile(r"\s*(Downloading|Using cached|File was already downloaded)"),
+    ),
+    (
+        "build",
+        re.compile(
+            r"\s*(Installing build dependencies|Getting requirements to build"
+            r"|Preparing (wheel )?metadata|Building wheels? for|Created wheel)"
+        ),
+    ),
+    ("install", re.compile(r"\s*(Installing collected packages|Attempting uninstall)")),
+    (
+        "resolve",
+        re.compile(r"\s*(Collecting|Requirement already satisfied|Processing)"),
+    ),
+]
+
+# first member of a packed env archive, see `pack_env`
+pack_manifest_name = ".pyscript-pack.json"
+
+# linux ioctl to share file extents copy-on-write (btrfs, xfs)
+FICLONE = 0x40049409
+
 
 # sanity checks
 def version_check():
@@ -55,7 +136,11 @@ def path_check(*args: Path):
 
 
 # arg parsing
-parser = argparse.ArgumentParser(prog="pyscript-init")
+parser = argparse.ArgumentParser(
+    prog="pyscript-init",
+    epilog="sub-commands: wheelhouse, clone, dedupe, verify, pack, unpack "
+    "(see `pyscript-init.py CMD --help`)",
+)
 parser.add_argument(
     "--dry-run",
     action="store_true",
@@ -65,7 +150,74 @@ parser.add_argument(
     "--force",
     action="store_true",
     default=False,
-    help="force clearing of [primary, build] env directory first",
+    help="force clearing of [primary, build] env directory first "
+    "(ignores up to date fingerprints)",
+)
+parser.add_argument(
+    "--jobs",
+    "-j",
+    action="store",
+    type=int,
+    metavar="N",
+    default=1,
+    help="provision envs concurrently with N workers, output prefixed by env name "
+    "(default: 1)",
+)
+parser.add_argument(
+    "--manifest",
+    metavar="FILE",
+    default=None,
+    help="provision the envs declared in toml manifest FILE instead of "
+    "[primary, build], honoring their dependencies (see README)",
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="[manifest] skip envs completed by the previous, interrupted or failed run",
+)
+parser.add_argument(
+    "--compile",
+    action="store_const",
+    const="timestamp",
+    default=None,
+    help="[primary] precompile all of site-packages in parallel after install, "
+    "reporting first-import time of each requirement before and after",
+)
+parser.add_argument(
+    "--compile-unchecked",
+    action="store_const",
+    dest="compile",
+    const="unchecked-hash",
+    help="[primary] like --compile, writing unchecked-hash pycs which are never "
+    "checked against their source (for read-only deploys)",
+)
+parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="time each phase of each env (pip split into resolve, download, build and "
+    "install), print a table and append json lines to the profile file",
+)
+parser.add_argument(
+    "--profile-file",
+    metavar="FILE",
+    default=None,
+    help="json lines file profile timings are appended to "
+    "(default: PYSCRIPT_ROOT_DIR/pyscript-profile.jsonl)",
+)
+parser.add_argument(
+    "--offline",
+    action="store_const",
+    dest="wheelhouse",
+    const=wheelhouse_default,
+    help=f"install from the default wheelhouse ({wheelhouse_default}), no index",
+)
+parser.add_argument(
+    "--wheelhouse",
+    action="store",
+    type=str,
+    metavar="DIR",
+    default=None,
+    help="install from wheelhouse DIR, no index (see `wheelhouse` sub-command)",
 )
 parser.add_argument(
     "--primary-name",
@@ -110,43 +262,275 @@ parser.add_argument(
 parser.add_argument(
     "root",
     metavar="PYSCRIPT_ROOT_DIR",
-    default="~/bin",
+    default=None,
     nargs="?",
-    help="directory [primary, build] envs will be installed into (default: ~/bin)",
+    help="directory [primary, build] envs will be installed into "
+    "(default: manifest `root`, or ~/bin)",
 )
 
+wheelhouse_parser = argparse.ArgumentParser(
+    prog="pyscript-init wheelhouse",
+    description="download or build wheels for [primary, build] env requirements "
+    "into a local content-addressed wheelhouse, for use with --offline/--wheelhouse",
+)
+wheelhouse_parser.add_argument(
+    "--dry-run",
+    action="store_true",
+    help="show actions and exit",
+)
+wheelhouse_parser.add_argument(
+    "--primary-reqs",
+    metavar="FILE",
+    type=argparse.FileType(mode="r", encoding="UTF-8"),
+    help=f"[primary] env requirements file (default: {','.join(primary_reqs_default)})",
+)
+wheelhouse_parser.add_argument(
+    "--build-reqs",
+    metavar="FILE",
+    type=argparse.FileType(mode="r", encoding="UTF-8"),
+    help=f"[build] env requirements file\n(default: {','.join(build_reqs_default)})",
+)
+wheelhouse_parser.add_argument(
+    "wheelhouse",
+    metavar="WHEELHOUSE_DIR",
+    default=wheelhouse_default,
+    nargs="?",
+    help=f"wheelhouse directory (default: {wheelhouse_default})",
+)
 
-# config processing
-def normalize_config(ns: argparse.Namespace):
-    root = Path(ns.root).expanduser().resolve()
-    primary_dir = (root / ns.primary_name).resolve()
-    build_dir = (root / ns.build_name).resolve()
 
-    path_check(root, primary_dir, build_dir)
+clone_parser = argparse.ArgumentParser(
+    prog="pyscript-init clone",
+    description="create a new env from an existing one, linking unchanged files "
+    "and rewriting only files which embed the env location",
+)
+clone_parser.add_argument(
+    "--dry-run",
+    action="store_true",
+    help="show actions and exit",
+)
+clone_parser.add_argument(
+    "--force",
+    action="store_true",
+    default=False,
+    help="remove DEST first when it already exists",
+)
+clone_parser.add_argument(
+    "--mode",
+    choices=["hardlink", "reflink", "copy"],
+    default="hardlink",
+    help="how unchanged files are shared with SRC, falls back to copy when the "
+    "filesystem does not support it (default: hardlink)",
+)
+clone_parser.add_argument("src", metavar="SRC", help="provisioned env to clone")
+clone_parser.add_argument("dest", metavar="DEST", help="new env directory")
 
-    primary_deps = (
-        primary_reqs_default
-        if ns.primary_reqs is None
-        else [v.strip() for v in ns.primary_reqs.readlines()]
+dedupe_parser = argparse.ArgumentParser(
+    prog="pyscript-init dedupe",
+    description="hash files across all envs under PYSCRIPT_ROOT_DIR, replace "
+    f"identical files with hardlinks into a shared store ({store_name})",
+)
+verify_parser = argparse.ArgumentParser(
+    prog="pyscript-init verify",
+    description="check files deduplicated by `pyscript-init.py dedupe`, relink "
+    "files which lost their link, drop changed files and unused store entries",
+)
+for _parser in (dedupe_parser, verify_parser):
+    _parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="show actions and exit",
     )
-    build_deps = (
-        build_reqs_default
-        if ns.build_reqs is None
-        else [v.strip() for v in ns.build_reqs.readlines()]
+    _parser.add_argument(
+        "root",
+        metavar="PYSCRIPT_ROOT_DIR",
+        default="~/bin",
+        nargs="?",
+        help="directory holding the envs (default: ~/bin)",
     )
 
-    return dict(
-        root=root,
-        force=ns.force,
-        dry_run=ns.dry_run,
-        envs=[
+
+pack_parser = argparse.ArgumentParser(
+    prog="pyscript-init pack",
+    description="archive a provisioned env as a relocatable .tar.gz, compressed in "
+    "parallel chunks, restore it with `pyscript-init.py unpack`",
+)
+pack_parser.add_argument(
+    "--dry-run",
+    action="store_true",
+    help="show actions and exit",
+)
+pack_parser.add_argument(
+    "--output",
+    "-o",
+    metavar="FILE",
+    default=None,
+    help="archive file (default: ./ENV_NAME.pyscript.tar.gz)",
+)
+pack_parser.add_argument(
+    "--jobs",
+    "-j",
+    type=int,
+    metavar="N",
+    default=os.cpu_count() or 1,
+    help="compression workers (default: cpu count)",
+)
+pack_parser.add_argument(
+    "--level",
+    type=int,
+    choices=range(1, 10),
+    metavar="1-9",
+    default=6,
+    help="gzip compression level (default: 6)",
+)
+pack_parser.add_argument("env", metavar="ENV", help="provisioned env to pack")
+
+unpack_parser = argparse.ArgumentParser(
+    prog="pyscript-init unpack",
+    description="stream-extract an archive made by `pyscript-init.py pack` and "
+    "rewrite its path dependent files for the new location",
+)
+unpack_parser.add_argument(
+    "--dry-run",
+    action="store_true",
+    help="show actions and exit",
+)
+unpack_parser.add_argument(
+    "--force",
+    action="store_true",
+    default=False,
+    help="remove DEST first when it already exists",
+)
+unpack_parser.add_argument(
+    "archive", metavar="ARCHIVE", help="archive file, or - to read from stdin"
+)
+unpack_parser.add_argument("dest", metavar="DEST", help="new env directory")
+
+
+# config processing
+def read_reqs(reqs, default):
+    """requirement lines from an open requirements file, or the defaults
+
+    blank lines and comments are dropped, so they never reach pip or the
+    env fingerprint
+    """
+    if reqs is None:
+        return default
+
+    lines = [v.split(" #")[0].strip() for v in reqs.readlines()]
+    return [v for v in lines if v and not v.startswith("#")]
+
+
+def load_manifest(path):
+    if tomllib is None:
+        print("ERROR: --manifest requires python>=3.11 or the tomli package")
+        sys.exit(1)
+
+    try:
+        with open(path, mode="rb") as f:
+            return tomllib.load(f)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: unable to read manifest [{str(path)}], {e}")
+        sys.exit(1)
+
+
+def manifest_envs(manifest, manifest_dir, root):
+    """env configs for every `[envs.NAME]` table of a manifest
+
+    supported keys, all optional:
+     - type: label shown in output (default: env)
+     - dir: env directory, relative to root (default: NAME)
+     - python: interpreter the env is created with
+     - flags: virtualenv flags, replacing the defaults
+     - requirements: list of requirement lines
+     - requirements_file: requirements file, relative to the manifest
+     - clone: name of an env to clone this env from when it doesn't exist yet
+     - depends: names of envs to provision first
+     - skip: skip actions for this env
+     - compile: precompile site-packages after install, "timestamp" or
+       "unchecked-hash" (see --compile, --compile-unchecked)
+    """
+    envs = []
+    for name, env in manifest.get("envs", {}).items():
+        deps = list(env.get("requirements", []))
+        if "requirements_file" in env:
+            reqs_path = (manifest_dir / env["requirements_file"]).expanduser()
+            with open(reqs_path, mode="r", encoding="UTF-8") as reqs:
+                deps += read_reqs(reqs, [])
+
+        clone = env.get("clone")
+        depends = list(env.get("depends", []))
+        if clone is not None and clone not in depends:
+            depends.append(clone)
+
+        envs.append(
+            dict(
+                type=env.get("type", "env"),
+                name=name,
+                dir=(root / env.get("dir", name)).expanduser().resolve(),
+                skip=env.get("skip", False),
+                deps=deps,
+                python=env.get("python", python_default),
+                flags=list(env.get("flags", virtualenv_flags_default)),
+                clone=clone,
+                depends=depends,
+                compile=env.get("compile"),
+            )
+        )
+
+    # every dependency must exist, and they can't form a cycle
+    names = {env["name"]: env for env in envs}
+    for env in envs:
+        for dep in env["depends"]:
+            if dep not in names:
+                print(f"ERROR: env [{env['name']}] depends on unknown env [{dep}]")
+                sys.exit(1)
+
+    done = set()
+    while len(done) < len(envs):
+        ready = [
+            v["name"]
+            for v in envs
+            if v["name"] not in done and all(d in done for d in v["depends"])
+        ]
+        if not ready:
+            cycle = sorted(set(names) - done)
+            print(f"ERROR: dependency cycle between envs [{','.join(cycle)}]")
+            sys.exit(1)
+        done.update(ready)
+
+    return envs
+
+
+def normalize_config(ns: argparse.Namespace):
+    manifest = None
+    manifest_path = None
+    if ns.manifest is not None:
+        manifest_path = Path(ns.manifest).expanduser().resolve()
+        manifest = load_manifest(manifest_path)
+
+    root = ns.root
+    if root is None:
+        root = "~/bin" if manifest is None else manifest.get("root", "~/bin")
+    root = Path(root).expanduser().resolve()
+
+    if manifest is None:
+        primary_dir = (root / ns.primary_name).resolve()
+        build_dir = (root / ns.build_name).resolve()
+        primary_deps = read_reqs(ns.primary_reqs, primary_reqs_default)
+        build_deps = read_reqs(ns.build_reqs, build_reqs_default)
+        envs = [
             dict(
                 type="primary",
                 name=ns.primary_name,
                 dir=primary_dir,
                 skip=ns.primary_skip,
                 deps=primary_deps,
-                force=ns.force,
+                python=python_default,
+                flags=virtualenv_flags_default,
+                clone=None,
+                depends=[],
+                compile=ns.compile,
             ),
             dict(
                 type="build",
@@ -154,27 +538,304 @@ def normalize_config(ns: argparse.Namespace):
                 dir=build_dir,
                 skip=ns.build_skip,
                 deps=build_deps,
-                force=ns.force,
+                python=python_default,
+                flags=virtualenv_flags_default,
+                clone=None,
+                depends=[],
+                compile=None,
             ),
-        ],
+        ]
+    else:
+        envs = manifest_envs(manifest, manifest_path.parent, root)
+
+    path_check(root, *[env["dir"] for env in envs])
+
+    wheelhouse = None
+    if ns.wheelhouse is not None:
+        wheelhouse = Path(ns.wheelhouse).expanduser().resolve()
+        if not (wheelhouse / "wheels").is_dir():
+            print(f"ERROR: no wheelhouse found at [{str(wheelhouse)}]")
+            sys.exit(1)
+
+    if ns.jobs < 1:
+        print(f"ERROR: --jobs must be at least 1, got {ns.jobs}")
+        sys.exit(1)
+
+    profile_file = None
+    if ns.profile:
+        profile_file = Path(ns.profile_file or root / "pyscript-profile.jsonl")
+        profile_file = profile_file.expanduser().resolve()
+
+    for env in envs:
+        env.update(force=ns.force, wheelhouse=wheelhouse)
+
+    return dict(
+        root=root,
+        force=ns.force,
+        dry_run=ns.dry_run,
+        jobs=ns.jobs,
+        profile=ns.profile,
+        profile_file=profile_file,
+        wheelhouse=wheelhouse,
+        manifest=manifest_path,
+        resume=ns.resume,
+        envs=envs,
+    )
+
+
+def normalize_wheelhouse_config(ns: argparse.Namespace):
+    return dict(
+        dry_run=ns.dry_run,
+        wheelhouse=Path(ns.wheelhouse).expanduser().resolve(),
+        reqs=dict(
+            primary=read_reqs(ns.primary_reqs, primary_reqs_default),
+            build=read_reqs(ns.build_reqs, build_reqs_default),
+        ),
+    )
+
+
+def normalize_clone_config(ns: argparse.Namespace):
+    src = Path(ns.src).expanduser().resolve()
+    dest = Path(ns.dest).expanduser().resolve()
+
+    if not (src / "pyvenv.cfg").exists():
+        print(f"ERROR: not a virtualenv, no pyvenv.cfg found in [{str(src)}]")
+        sys.exit(1)
+
+    # --force clears dest, it must not overlap src
+    if dest == src or src in dest.parents or dest in src.parents:
+        print(f"ERROR: clone destination [{str(dest)}] overlaps source [{str(src)}]")
+        sys.exit(1)
+
+    path_check(dest)
+    if dest.exists() and any(dest.iterdir()) and not ns.force:
+        print(f"ERROR: path is not empty [{str(dest)}], use --force to replace it")
+        sys.exit(1)
+
+    return dict(dry_run=ns.dry_run, force=ns.force, mode=ns.mode, src=src, dest=dest)
+
+
+def normalize_store_config(ns: argparse.Namespace):
+    root = Path(ns.root).expanduser().resolve()
+    if not root.is_dir():
+        print(f"ERROR: path is not a directory [{str(root)}]")
+        sys.exit(1)
+
+    return dict(dry_run=ns.dry_run, root=root)
+
+
+def normalize_pack_config(ns: argparse.Namespace):
+    env = Path(ns.env).expanduser().resolve()
+    if not (env / "pyvenv.cfg").exists():
+        print(f"ERROR: not a virtualenv, no pyvenv.cfg found in [{str(env)}]")
+        sys.exit(1)
+
+    output = Path(ns.output or f"{env.name}.pyscript.tar.gz")
+    return dict(
+        dry_run=ns.dry_run,
+        env=env,
+        output=output.expanduser().resolve(),
+        jobs=max(ns.jobs, 1),
+        level=ns.level,
+    )
+
+
+def normalize_unpack_config(ns: argparse.Namespace):
+    archive = ns.archive
+    if archive != "-":
+        archive = Path(archive).expanduser().resolve()
+        if not archive.is_file():
+            print(f"ERROR: archive not found [{str(archive)}]")
+            sys.exit(1)
+
+    dest = Path(ns.dest).expanduser().resolve()
+    path_check(dest)
+    if dest.exists() and any(dest.iterdir()) and not ns.force:
+        print(f"ERROR: path is not empty [{str(dest)}], use --force to replace it")
+        sys.exit(1)
+
+    return dict(dry_run=ns.dry_run, force=ns.force, archive=archive, dest=dest)
+
+
+# env fingerprints
+@functools.lru_cache(maxsize=None)
+def python_version(python):
+    """version of the given interpreter, only spawns it when it isn't this one"""
+    if python == python_default:
+        return platform.python_version()
+
+    cmd = [python, "-c", "import platform; print(platform.python_version())"]
+    return subprocess.run(
+        cmd, stdout=subprocess.PIPE, universal_newlines=True
+    ).stdout.strip()
+
+
+def env_fingerprint(config):
+    """fingerprint of everything an env is provisioned from
+
+    `env` covers the interpreter and virtualenv flags (a change means the env is
+    recreated), `deps` the normalized requirements (a change is reconciled),
+    `compile` the bytecode compile mode when set (a change recompiles)
+    """
+    env = dict(
+        python=str(config["python"]),
+        version=python_version(str(config["python"])),
+        flags=list(config["flags"]),
     )
+    deps = sorted(config["deps"])
+    content = dict(env=env, deps=deps)
+    if config.get("compile") is not None:
+        content["compile"] = config["compile"]
+
+    digest = hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf8"))
+    return dict(fingerprint=digest.hexdigest(), **content)
+
+
+def read_stamp(path):
+    try:
+        with open(Path(path) / stamp_name, mode="rt", encoding="utf8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def canonical_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_req(req):
+    """(canonical name, pinned version or None) for a requirement line
+
+    returns None for anything beyond `name[extras]` or `name[extras]==version`,
+    those are always handed to pip to evaluate
+    """
+    match = re.fullmatch(
+        r"([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(?:==\s*([^\s;,*]+))?",
+        req.strip(),
+    )
+    if match is None:
+        return None
+    return canonical_name(match.group(1)), match.group(3)
+
+
+def installed_dists(path):
+    """{canonical name: version} read from the env's site-packages metadata"""
+    dists = {}
+    for metadata in Path(path).glob("lib/python*/site-packages/*.dist-info/METADATA"):
+        name = version = None
+        with open(metadata, mode="rt", encoding="utf8", errors="replace") as f:
+            for line in f:
+                if line.startswith("Name:"):
+                    name = line[5:].strip()
+                elif line.startswith("Version:"):
+                    version = line[8:].strip()
+                elif not line.strip() or (name and version):
+                    break
+        if name and version:
+            dists[canonical_name(name)] = version
+    return dists
+
+
+def top_level_modules(path, deps):
+    """importable top-level names provided by the env's requirements
+
+    read from `top_level.txt`, or the paths in `RECORD` when there is none
+    """
+    names = {v[0] for v in [parse_req(req) for req in deps] if v is not None}
+    modules = set()
+    for dist_info in Path(path).glob("lib/python*/site-packages/*.dist-info"):
+        if (
+            canonical_name(dist_info.name[: -len(".dist-info")].split("-")[0])
+            not in names
+        ):
+            continue
+
+        if (dist_info / "top_level.txt").exists():
+            lines = (dist_info / "top_level.txt").read_text().split()
+        else:
+            record = (dist_info / "RECORD").read_text().splitlines()
+            lines = [v.split(",")[0].split("/")[0] for v in record]
+            lines = [v[:-3] if v.endswith(".py") else v for v in lines]
+            lines = [v for v in lines if "." not in v and v.isidentifier()]
+
+        modules.update([v for v in lines if v and not v.startswith("_")])
+    return sorted(modules)
+
+
+def import_seconds(path, module, cold=False):
+    """first-import wall time of module in a fresh interpreter, None on failure
+
+    bytecode is not written, so measuring doesn't warm up later measurements.
+    When `cold`, bytecode is looked up under an empty PYTHONPYCACHEPREFIX, so
+    existing pycs are not read either (python >= 3.8, older envs read them)
+    """
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; print(time.perf_counter() - t)"
+    )
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("PYTHONPYCACHEPREFIX", None)
+    with tempfile.TemporaryDirectory(prefix="pyscript-pycache-") as prefix:
+        if cold:
+            env["PYTHONPYCACHEPREFIX"] = prefix
+        proc = subprocess.run(
+            [str(Path(path) / "bin" / "python3"), "-c", code],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+            env=env,
+        )
+    return float(proc.stdout) if proc.returncode == 0 else None
+
+
+def reconcile_plan(deps, installed, previous_deps):
+    """requirements to install, and packages to remove, to bring an env up to date
+
+    packages dropped from the requirements since the last provisioning are
+    removed, dependencies pulled in by pip along the way are left alone
+    """
+    install = []
+    wanted = set()
+    for req in deps:
+        parsed = parse_req(req)
+        if parsed is None:
+            install.append(req)
+            continue
+
+        name, version = parsed
+        wanted.add(name)
+        if name not in installed or (
+            version is not None and installed[name] != version
+        ):
+            install.append(req)
+
+    remove = []
+    for req in previous_deps:
+        parsed = parse_req(req)
+        if parsed is not None and parsed[0] not in wanted and parsed[0] in installed:
+            remove.append(parsed[0])
+
+    return install, remove
 
 
 # actions
-def virtualenv_cmd(path, force):
+def virtualenv_cmd(
+    path, force, wheelhouse=None, python=python_default, flags=virtualenv_flags_default
+):
     cmd = [
         "virtualenv",
         "--python",
-        sys.base_prefix + "/bin/python3",
-        "--download",
-        "--seeder",
-        "pip",
-        "--always-copy",
-        "--no-setuptools",
-        "--no-wheel",
-        "--no-vcs-ignore",
+        str(python),
     ]
 
+    # seed from virtualenv's embedded wheels plus the wheelhouse when offline
+    if wheelhouse is None:
+        cmd.append("--download")
+    else:
+        cmd += ["--no-download", "--extra-search-dir", str(wheelhouse / "wheels")]
+
+    cmd += flags
+
     if force:
         cmd.append("--clear")
 
@@ -183,7 +844,7 @@ def virtualenv_cmd(path, force):
     return cmd
 
 
-def pip_cmd(path, deps):
+def pip_cmd(path, deps, wheelhouse=None, byte_compile=True):
     cmd = [
         str(Path(path) / "bin" / "python3"),
         "-m",
@@ -191,47 +852,1147 @@ def pip_cmd(path, deps):
         "install",
     ]
 
+    # bytecode is left to the compile stage when it runs
+    if not byte_compile:
+        cmd.append("--no-compile")
+
+    if wheelhouse is not None:
+        cmd += ["--no-index", "--find-links", str(wheelhouse / "wheels")]
+
+    cmd = cmd + deps
+    return cmd
+
+
+def pip_uninstall_cmd(path, names):
+    cmd = [
+        str(Path(path) / "bin" / "python3"),
+        "-m",
+        "pip",
+        "uninstall",
+        "--yes",
+    ]
+
+    cmd = cmd + names
+    return cmd
+
+
+def compile_cmd(path, mode):
+    """compile site-packages with the env's own python, one worker per core"""
+    cmd = [
+        str(Path(path) / "bin" / "python3"),
+        "-m",
+        "compileall",
+        "-q",
+        "-j",
+        "0",
+    ]
+
+    # pycs written by pip on earlier installs are timestamp based, force a rewrite
+    if mode == "unchecked-hash":
+        cmd += ["-f", "--invalidation-mode", "unchecked-hash"]
+
+    cmd = cmd + [str(v) for v in sorted(Path(path).glob("lib/python*/site-packages"))]
+    return cmd
+
+
+def wheel_cmd(dest, deps, wheelhouse):
+    # previously stored wheels are offered to pip so they are not rebuilt
+    cmd = [
+        sys.executable,
+        "-m",
+        "pip",
+        "wheel",
+        "--wheel-dir",
+        str(dest),
+        "--find-links",
+        str(wheelhouse / "wheels"),
+    ]
+
     cmd = cmd + deps
     return cmd
 
 
-def main(config, dry_run):
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, mode="rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def wheelhouse_add(wheelhouse, path):
+    """store a wheel by content hash, link it into the flat `wheels` directory
+
+    layout of the wheelhouse directory:
+     - sha256/{digest[:2]}/{digest}  wheel content, one file per unique wheel
+     - wheels/{wheel filename}       hardlink to content, used by --find-links
+     - index.json                    {wheel filename: digest}
+
+    returns (digest, added), added is False when the content was already stored
+    """
+    digest = file_digest(path)
+    blob = wheelhouse / "sha256" / digest[:2] / digest
+    link = wheelhouse / "wheels" / path.name
+
+    added = not blob.exists()
+    if added:
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(path), str(blob))
+
+    link.parent.mkdir(parents=True, exist_ok=True)
+    if link.exists() and os.path.samefile(link, blob):
+        return digest, added
+    if link.exists():
+        link.unlink()
+    try:
+        os.link(blob, link)
+    except OSError:
+        shutil.copy2(blob, link)
+
+    return digest, added
+
+
+def write_json(path, content):
+    """write json to path atomically, readers never see a partial file"""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, mode="wt", encoding="utf8") as f:
+        json.dump(content, f, indent=4, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+# env relocation
+def path_dependent_files(env):
+    """env relative paths of text files that embed the env's absolute location
+
+    virtualenv writes its location into pyvenv.cfg, the activation scripts and
+    console-script shebangs in `bin/`, and pip can write it into `.pth` files
+    """
+    prefix = str(env).encode("utf8")
+    candidates = [env / "pyvenv.cfg"]
+    candidates += sorted((env / "bin").glob("*"))
+    candidates += sorted(env.glob("lib/python*/site-packages/*.pth"))
+
+    output = []
+    for path in candidates:
+        if path.is_symlink() or not path.is_file():
+            continue
+        content = path.read_bytes()
+        if prefix in content and b"\0" not in content[:8192]:
+            output.append(path.relative_to(env))
+    return output
+
+
+def relocate_file(path, old, new):
+    """replace the old env location with the new one, as a new file"""
+    content = path.read_bytes().replace(
+        str(old).encode("utf8"), str(new).encode("utf8")
+    )
+    mode = path.stat().st_mode
+    path.unlink()
+    path.write_bytes(content)
+    path.chmod(mode)
+
+
+def reflink_file(src, dest):
+    with open(src, mode="rb") as s, open(dest, mode="wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+    shutil.copystat(src, dest)
+
+
+def share_file(src, dest, mode):
+    """hardlink or reflink src to dest, copy when not supported, returns method"""
+    if mode == "hardlink":
+        try:
+            os.link(src, dest)
+            return "hardlink"
+        except OSError:
+            pass
+
+    if mode in ("hardlink", "reflink"):
+        try:
+            reflink_file(src, dest)
+            return "reflink"
+        except OSError:
+            if os.path.lexists(dest):
+                os.unlink(dest)
+
+    shutil.copy2(src, dest)
+    return "copy"
+
+
+def clone_env(src, dest, mode="hardlink"):
+    """create dest from the provisioned env at src
+
+    unchanged files are shared with src, path dependent files are written as
+    new files with src replaced by dest. sharing hardlinks is safe as long as
+    files are replaced rather than modified in place, which is how pip and the
+    bytecode compiler write them.
+
+    returns {method: file count}
+    """
+    rewrite = set(path_dependent_files(src))
+    counts = dict(hardlink=0, reflink=0, copy=0, symlink=0, rewritten=0)
+
+    dest.mkdir(parents=True, exist_ok=True)
+    for dirpath, dirnames, filenames in os.walk(src):
+        current = Path(dirpath)
+        target = dest / current.relative_to(src)
+
+        for name in list(dirnames) + filenames:
+            path = current / name
+            if not path.is_symlink():
+                continue
+            link = os.readlink(path)
+            if link == str(src) or link.startswith(str(src) + os.sep):
+                link = str(dest) + link[len(str(src)) :]
+            os.symlink(link, target / name)
+            counts["symlink"] += 1
+
+        # symlinked directories were recreated above, only walk real ones
+        dirnames[:] = [v for v in dirnames if not (current / v).is_symlink()]
+        for name in dirnames:
+            (target / name).mkdir(exist_ok=True)
+            shutil.copystat(current / name, target / name)
+
+        for name in filenames:
+            path = current / name
+            if path.is_symlink():
+                continue
+            counts[share_file(path, target / name, mode)] += 1
+            if path.relative_to(src) in rewrite:
+                relocate_file(target / name, src, dest)
+                counts["rewritten"] += 1
+
+    return counts
+
+
+# env archives
+def gzip_member(data, level=6):
+    """`data` as one gzip member with a zero mtime, for reproducible archives
+
+    the header is written here since `gzip.compress` only takes an mtime on
+    python >= 3.8
+    """
+    xfl = 2 if level == 9 else 4 if level == 1 else 0
+    header = b"\x1f\x8b\x08\x00" + struct.pack("<I", 0) + bytes([xfl, 255])
+    deflate = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    trailer = struct.pack("<II", zlib.crc32(data) & 0xFFFFFFFF, len(data) & 0xFFFFFFFF)
+    return header + deflate.compress(data) + deflate.flush() + trailer
+
+
+class ParallelGzipWriter:
+    """write-only file object, gzip compressing fixed size chunks in a pool
+
+    every chunk becomes its own gzip member, a concatenation of members is a
+    valid gzip stream for any gzip reader (including `tar -xzf`). compressed
+    chunks are written in order, with a bounded number in flight.
+    """
+
+    def __init__(self, fileobj, jobs, level=6, chunk_size=4 << 20):
+        self.fileobj = fileobj
+        self.jobs = jobs
+        self.level = level
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.pending = deque()
+        self.pool = ThreadPoolExecutor(max_workers=jobs)
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.chunk_size:
+            self.submit(bytes(self.buffer[: self.chunk_size]))
+            del self.buffer[: self.chunk_size]
+        return len(data)
+
+    def submit(self, chunk):
+        self.pending.append(self.pool.submit(gzip_member, chunk, self.level))
+        while len(self.pending) > self.jobs * 2:
+            self.fileobj.write(self.pending.popleft().result())
+
+    def close(self):
+        if self.buffer:
+            self.submit(bytes(self.buffer))
+            self.buffer.clear()
+        while self.pending:
+            self.fileobj.write(self.pending.popleft().result())
+        self.pool.shutdown()
+
+
+def read_pyvenv_cfg(env):
+    cfg = {}
+    for line in (env / "pyvenv.cfg").read_text(encoding="utf8").splitlines():
+        key, _, value = line.partition("=")
+        cfg[key.strip()] = value.strip()
+    return cfg
+
+
+def absolute_links(env):
+    """env relative paths of symlinks pointing into the env by absolute path"""
+    output = []
+    for path in sorted(env.rglob("*")):
+        if path.is_symlink():
+            link = os.readlink(path)
+            if link == str(env) or link.startswith(str(env) + os.sep):
+                output.append(path.relative_to(env))
+    return output
+
+
+def pack_env(env, output, jobs, level=6):
+    """write env to output as a tar stream, compressed by ParallelGzipWriter
+
+    the first member is a json manifest recording the env location and the
+    files and symlinks depending on it, for `unpack_env` to relocate.
+    returns the number of archived paths.
+    """
+    manifest = dict(
+        format=1,
+        prefix=str(env),
+        home=read_pyvenv_cfg(env).get("home"),
+        files=[str(v) for v in path_dependent_files(env)],
+        links=[str(v) for v in absolute_links(env)],
+    )
+    content = json.dumps(manifest, indent=4, sort_keys=True).encode("utf8")
+
+    count = 0
+    with open(output, mode="wb") as f:
+        writer = ParallelGzipWriter(f, jobs, level)
+        with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            info = tarfile.TarInfo(pack_manifest_name)
+            info.size = len(content)
+            # like the files, for reproducible archives
+            info.mtime = int((env / "pyvenv.cfg").stat().st_mtime)
+            tar.addfile(info, fileobj=io.BytesIO(content))
+
+            for dirpath, dirnames, filenames in os.walk(env):
+                dirnames.sort()
+                current = Path(dirpath)
+                for name in sorted(dirnames + filenames):
+                    path = current / name
+                    tar.add(
+                        str(path), arcname=str(path.relative_to(env)), recursive=False
+                    )
+                    count += 1
+        writer.close()
+
+    return count
+
+
+def check_member(member, dest):
+    """raise ValueError when extracting member would write outside dest
+
+    for pythons without tarfile extraction filters. Paths are resolved through
+    the symlinks extracted so far, symlinks themselves may point anywhere
+    (absolute links into the env are rewritten when relocating)
+    """
+    root = os.path.realpath(dest)
+    path = os.path.join(root, member.name)
+    if member.issym():
+        # replaced by the link, not followed
+        parent, name = os.path.split(path)
+        targets = [os.path.join(os.path.realpath(parent), name)]
+    else:
+        targets = [os.path.realpath(path)]
+    if member.islnk():
+        targets.append(os.path.realpath(os.path.join(root, member.linkname)))
+
+    for target in targets:
+        if os.path.commonpath([root, target]) != root:
+            raise ValueError(f"unsafe path in archive [{member.name}]")
+
+
+def unpack_env(archive, dest):
+    """stream-extract an archive written by `pack_env` into dest, relocate it
+
+    returns the archive manifest
+    """
+    manifest = None
+    extract_args = dict(filter="tar") if hasattr(tarfile, "tar_filter") else {}
+    fileobj = sys.stdin.buffer if archive == "-" else open(archive, mode="rb")
+
+    dest.mkdir(parents=True, exist_ok=True)
+    with fileobj, gzip.GzipFile(fileobj=fileobj, mode="rb") as gz:
+        with tarfile.open(fileobj=gz, mode="r|") as tar:
+            for member in tar:
+                if member.name == pack_manifest_name:
+                    manifest = json.load(tar.extractfile(member))
+                    continue
+                if member.name.startswith("/") or ".." in Path(member.name).parts:
+                    raise ValueError(f"unsafe path in archive [{member.name}]")
+                if not extract_args:
+                    check_member(member, dest)
+                tar.extract(member, str(dest), **extract_args)
+
+    if manifest is None:
+        raise ValueError("not an env archive, no pack manifest found")
+
+    prefix = manifest["prefix"]
+    for rel in manifest["files"]:
+        relocate_file(dest / rel, prefix, dest)
+    for rel in manifest["links"]:
+        link = os.readlink(dest / rel)
+        (dest / rel).unlink()
+        os.symlink(str(dest) + link[len(prefix) :], dest / rel)
+
+    return manifest
+
+
+# env deduplication
+def managed_envs(root):
+    """every virtualenv directly under root"""
+    return sorted([v.parent for v in root.glob("*/pyvenv.cfg")])
+
+
+def store_key(digest, mode, mtime=None):
+    """store entry name, `mtime` (seconds) is part of it when given
+
+    permissions and mtime are shared by hardlinks, so they are part of the
+    identity. Timestamp based pycs check their source's mtime (in seconds), a
+    .py linked to another env's copy must keep the mtime its pycs recorded
+    """
+    key = f"{digest[:2]}/{digest}-{mode & 0o7777:o}"
+    return key if mtime is None else f"{key}-{int(mtime) & 0xFFFFFFFF}"
+
+
+def read_store_manifest(store):
+    try:
+        with open(store / "manifest.json", mode="rt", encoding="utf8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def link_to_blob(blob, path):
+    """atomically replace path with a hardlink to blob"""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.dedupe")
+    os.link(blob, tmp)
+    os.replace(tmp, path)
+
+
+def dedupe_env(root, env, manifest, dry_run, planned=None):
+    """replace files in env by hardlinks into the store, returns counts
+
+    `manifest` maps root relative paths to store keys and is updated in place,
+    files already linked to their recorded store entry are not hashed again.
+    In dry-run, store entries that would be created are tracked in `planned`
+    (key to device and inode), pass the same dict for every env of a run
+    """
+    store = root / store_name
+    planned = {} if planned is None else planned
+    counts = dict(files=0, linked=0, stored=0, reclaimed=0)
+
+    for path in sorted(env.rglob("*")):
+        if path.is_symlink() or not path.is_file():
+            continue
+        st = path.stat()
+        if st.st_size == 0:
+            continue
+        counts["files"] += 1
+
+        rel = str(path.relative_to(root))
+        if rel in manifest:
+            blob = store / "sha256" / manifest[rel]
+            if blob.exists() and os.path.samefile(blob, path):
+                continue
+
+        mtime = st.st_mtime if path.suffix == ".py" else None
+        key = store_key(file_digest(path), st.st_mode, mtime)
+        blob = store / "sha256" / key
+        manifest[rel] = key
+
+        if key in planned:
+            blob_id = planned[key]
+        elif blob.exists():
+            bst = blob.stat()
+            blob_id = (bst.st_dev, bst.st_ino)
+        else:
+            counts["stored"] += 1
+            if dry_run:
+                planned[key] = (st.st_dev, st.st_ino)
+            else:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                os.link(path, blob)
+            continue
+
+        if blob_id == (st.st_dev, st.st_ino):
+            continue
+        if blob_id[0] != st.st_dev:
+            del manifest[rel]
+            continue
+
+        counts["linked"] += 1
+        if st.st_nlink == 1:
+            counts["reclaimed"] += st.st_size
+        if not dry_run:
+            link_to_blob(blob, path)
+
+    return counts
+
+
+def verify_store(root, manifest, dry_run):
+    """check manifest entries against the store, repair what can be repaired
+
+    - missing store entry, file unchanged: file is put back into the store
+    - file lost its link, content unchanged: file is relinked
+    - file removed or changed (e.g. upgraded by pip): entry is dropped
+    - store entry content changed: entry is reported corrupt and dropped,
+      every file linked to it carries the changed content
+    - store entries no env links to anymore are removed
+
+    returns counts, `manifest` is updated in place
+    """
+    store = root / store_name
+    counts = dict(ok=0, relinked=0, restored=0, dropped=0, corrupt=0, collected=0)
+    checked = {}
+
+    for rel, key in sorted(manifest.items()):
+        path = root / rel
+        blob = store / "sha256" / key
+        digest = key.split("/")[-1].split("-")[0]
+
+        if path.is_symlink() or not path.is_file():
+            counts["dropped"] += 1
+            del manifest[rel]
+            continue
+
+        if not blob.exists():
+            if file_digest(path) != digest:
+                counts["dropped"] += 1
+                del manifest[rel]
+                continue
+            counts["restored"] += 1
+            if not dry_run:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                os.link(path, blob)
+            continue
+
+        if key not in checked:
+            checked[key] = file_digest(blob) == digest
+        if not checked[key]:
+            counts["corrupt"] += 1
+            del manifest[rel]
+            print(f"[ corrupt ] {rel}")
+            continue
+
+        if os.path.samefile(blob, path):
+            counts["ok"] += 1
+            continue
+
+        if file_digest(path) != digest:
+            counts["dropped"] += 1
+            del manifest[rel]
+            continue
+
+        counts["relinked"] += 1
+        if not dry_run:
+            link_to_blob(blob, path)
+
+    # corrupt entries are removed as well, files linked to them keep the content
+    for blob in sorted(store.glob("sha256/*/*")):
+        key = str(blob.relative_to(store / "sha256"))
+        if blob.stat().st_nlink == 1 or checked.get(key) is False:
+            counts["collected"] += 1
+            if not dry_run:
+                blob.unlink()
+
+    return counts
+
+
+def format_bytes(size):
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024 or unit == "GiB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} {unit}"
+        size /= 1024
+
+
+# output handling
+_print_lock = threading.Lock()
+
+
+def echo_fn(prefix=None):
+    """return a print-like function, prefixing every output line when set
+
+    prefixed output is written under a shared lock, so lines from concurrently
+    provisioned envs interleave whole and stay attributable to their env
+    """
+    if prefix is None:
+        return print
+
+    def echo(*args):
+        text = " ".join([str(v) for v in args])
+        with _print_lock:
+            for line in text.split("\n"):
+                print(f"{prefix} {line}".rstrip())
+            sys.stdout.flush()
+
+    return echo
+
+
+def run_cmd(cmd, echo, on_line=None):
+    """run cmd and return its exit code
+
+    output goes straight to the terminal for plain `print`, otherwise it is
+    captured and passed line by line through `on_line` (when set) and `echo`
+    """
+    if echo is print and on_line is None:
+        return subprocess.run(cmd).returncode
+
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+        env=dict(os.environ, PYTHONUNBUFFERED="1"),
+    )
+    for line in proc.stdout:
+        if on_line is not None:
+            on_line(line)
+        echo(line.rstrip("\n"))
+    return proc.wait()
+
+
+# profiling
+@contextlib.contextmanager
+def timed(phases, phase):
+    """append the monotonic wall time of the block to phases"""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        phases.append(dict(phase=phase, seconds=time.monotonic() - start))
+
+
+class PipPhaseTimer:
+    """splits the wall time of a pip run into phases by reading its output
+
+    each marker line in `pip_phase_markers` ends the running phase and starts
+    its own, pip starts out resolving. phases interleave (pip resolves and
+    downloads package by package), so time is summed per phase.
+    """
+
+    def __init__(self):
+        self.phase = "resolve"
+        self.start = time.monotonic()
+        self.totals = {}
+
+    def line(self, line):
+        for phase, pattern in pip_phase_markers:
+            if pattern.match(line):
+                if phase != self.phase:
+                    self.switch(phase)
+                return
+
+    def switch(self, phase):
+        now = time.monotonic()
+        self.totals[self.phase] = self.totals.get(self.phase, 0) + now - self.start
+        self.phase = phase
+        self.start = now
+
+    def phases(self):
+        self.switch(None)
+        return [dict(phase=f"pip-{k}", seconds=v) for k, v in self.totals.items()]
+
+
+def main(config, dry_run, echo=print, profile=False):
+    start = time.monotonic()
+    phases = []
+    result = dict(
+        type=config["type"],
+        name=config["name"],
+        status="ok",
+        returncode=0,
+        phases=phases,
+    )
+
+    # header
+    echo("#" * 80)
+    echo(f"### {config['type'].upper()} - {config['name']} - {str(config['dir'])}")
+    echo("#" * 80, "\n")
+
+    if config["skip"]:
+        echo("~~~ skipped ~~~", "\n")
+        result.update(status="skipped", seconds=time.monotonic() - start)
+        return result
+
+    # show config on dry_run
+    if dry_run:
+        echo(f"~~~ config {'[dry-run] ' if dry_run else ''}~~~")
+        echo(
+            json.dumps(config, indent=4, sort_keys=True, default=lambda o: str(o)), "\n"
+        )
+        result["status"] = "dry-run"
+
+    # skip env entirely when provisioned from the same inputs last time
+    with timed(phases, "fingerprint"):
+        fingerprint = env_fingerprint(config)
+        stamp = read_stamp(config["dir"])
+    echo(f"~~~ fingerprint {fingerprint['fingerprint'][:12]} ~~~", "\n")
+    if not config["force"] and stamp is not None:
+        if stamp.get("fingerprint") == fingerprint["fingerprint"]:
+            echo("~~~ up to date, skipping ~~~", "\n")
+            result.update(status="current", seconds=time.monotonic() - start)
+            return result
+
+    # virtualenv action, only when the env is missing or its interpreter/flags
+    # changed, cleared when it was provisioned with another interpreter/flags
+    env_changed = stamp is not None and stamp.get("env") != fingerprint["env"]
+    if config["force"] or env_changed or not (config["dir"] / "pyvenv.cfg").exists():
+        cmd = virtualenv_cmd(
+            config["dir"],
+            config["force"] or env_changed,
+            config["wheelhouse"],
+            config["python"],
+            config["flags"],
+        )
+        echo(f"~~~ virtualenv command {'[dry-run] ' if dry_run else ''}~~~")
+        echo(" ".join([str(v) for v in cmd]), "\n")
+        if not dry_run:
+            with timed(phases, "virtualenv"):
+                result["returncode"] = run_cmd(cmd, echo)
+        echo()
+
+    # pip actions, only for the delta against what is installed
+    with timed(phases, "scan"):
+        previous_deps = [] if stamp is None or env_changed else stamp.get("deps", [])
+        install, remove = reconcile_plan(
+            config["deps"], installed_dists(config["dir"]), previous_deps
+        )
+
+    if result["returncode"] == 0 and remove:
+        cmd = pip_uninstall_cmd(config["dir"], remove)
+        echo(f"~~~ pip uninstall command {'[dry-run] ' if dry_run else ''}~~~")
+        echo(" ".join(cmd), "\n")
+        if not dry_run:
+            with timed(phases, "pip-uninstall"):
+                result["returncode"] = run_cmd(cmd, echo)
+        echo()
+
+    if result["returncode"] == 0 and install:
+        cmd = pip_cmd(
+            config["dir"],
+            install,
+            config["wheelhouse"],
+            byte_compile=config.get("compile") is None,
+        )
+        echo(f"~~~ pip command {'[dry-run] ' if dry_run else ''}~~~")
+        echo(" ".join(cmd), "\n")
+        if not dry_run:
+            timer = PipPhaseTimer() if profile else None
+            result["returncode"] = run_cmd(cmd, echo, timer and timer.line)
+            if timer is not None:
+                phases.extend(timer.phases())
+        echo()
+
+    # bytecode action, compile failures (e.g. unsupported syntax in a vendored
+    # file) are reported but don't fail the env
+    if result["returncode"] == 0 and config.get("compile") is not None:
+        cmd = compile_cmd(config["dir"], config["compile"])
+        echo(f"~~~ compile command {'[dry-run] ' if dry_run else ''}~~~")
+        echo(" ".join(cmd), "\n")
+        if not dry_run:
+            modules = top_level_modules(config["dir"], config["deps"])
+            with timed(phases, "import-before"):
+                before = {
+                    v: import_seconds(config["dir"], v, cold=True) for v in modules
+                }
+            with timed(phases, "compile"):
+                if run_cmd(cmd, echo) != 0:
+                    echo("WARNING: some files failed to compile")
+            with timed(phases, "import-after"):
+                after = {v: import_seconds(config["dir"], v) for v in modules}
+
+            echo()
+            # before: no pycs read, after: the compiled pycs
+            echo(f"[ {'MODULE' : <14} ] {'BEFORE' : >8} {'AFTER' : >8} (first import)")
+            echo("~" * 60)
+            for module in modules:
+                times = [before[module], after[module]]
+                times = [" failed" if v is None else f"{v : .4f}" for v in times]
+                echo(f"[ {module : <14} ] {times[0] : >8} {times[1] : >8}")
+        echo()
+
+    if result["returncode"] != 0:
+        result["status"] = "failed"
+    elif not dry_run:
+        with timed(phases, "stamp"):
+            write_json(config["dir"] / stamp_name, fingerprint)
+
+    result["seconds"] = time.monotonic() - start
+    return result
+
+
+def wheelhouse_main(config):
+    dry_run = config["dry_run"]
+    wheelhouse = config["wheelhouse"]
+
     # header
     print("#" * 80)
-    print(f"### {config['type'].upper()} - {config['name']} - {str(config['dir'])}")
+    print(f"### WHEELHOUSE - {str(wheelhouse)}")
     print("#" * 80, "\n")
 
-    # show config on dry_run
+    index_path = wheelhouse / "index.json"
+    index = {}
+    if index_path.exists():
+        with open(index_path, mode="rt", encoding="utf8") as f:
+            index = json.load(f)
+
+    # each env resolves on its own, just like the envs themselves
+    returncode = 0
+    for env_type, deps in config["reqs"].items():
+        with tempfile.TemporaryDirectory(prefix="pyscript-wheels-") as tmp:
+            cmd = wheel_cmd(tmp, deps, wheelhouse)
+            print(f"~~~ {env_type} pip wheel {'[dry-run] ' if dry_run else ''}~~~")
+            print(" ".join(cmd), "\n")
+            if dry_run:
+                continue
+
+            (wheelhouse / "wheels").mkdir(parents=True, exist_ok=True)
+            result = subprocess.run(cmd).returncode
+            if result != 0:
+                returncode = result
+                continue
+
+            print()
+            for whl in sorted(Path(tmp).glob("*.whl")):
+                digest, added = wheelhouse_add(wheelhouse, whl)
+                index[whl.name] = digest
+                status = "added" if added else "exists"
+                print(f"[ {status : <6} ] {digest[:12]} {whl.name}")
+            print()
+
+    if not dry_run and index:
+        write_json(index_path, index)
+
+    return returncode
+
+
+def clone_main(config):
+    start = time.monotonic()
+    dry_run = config["dry_run"]
+
+    # header
+    print("#" * 80)
+    print(f"### CLONE - {str(config['src'])} -> {str(config['dest'])}")
+    print("#" * 80, "\n")
+
+    print(f"~~~ path dependent files {'[dry-run] ' if dry_run else ''}~~~")
+    print("\n".join([str(v) for v in path_dependent_files(config["src"])]), "\n")
     if dry_run:
-        print(f"~~~ config {'[dry-run] ' if dry_run else ''}~~~")
+        return 0
+
+    if config["force"] and config["dest"].exists():
+        shutil.rmtree(config["dest"])
+
+    counts = clone_env(config["src"], config["dest"], config["mode"])
+    print(f"~~~ cloned in {time.monotonic() - start:.2f} seconds ~~~")
+    print(" ".join([f"{k}={v}" for k, v in counts.items()]), "\n")
+    return 0
+
+
+def dedupe_main(config):
+    dry_run = config["dry_run"]
+    root = config["root"]
+    store = root / store_name
+
+    # header
+    print("#" * 80)
+    print(f"### DEDUPE - {str(root)}")
+    print("#" * 80, "\n")
+
+    manifest = read_store_manifest(store)
+    planned = {}
+    total = 0
+    print(f"~~~ dedupe {'[dry-run] ' if dry_run else ''}~~~", "\n")
+    print(f"[ {'ENV_NAME' : <14} ] {'FILES' : >7} {'STORED' : >7}", end="")
+    print(f" {'LINKED' : >7} RECLAIMED")
+    print("~" * 60)
+    for env in managed_envs(root):
+        counts = dedupe_env(root, env, manifest, dry_run, planned)
+        total += counts["reclaimed"]
         print(
-            json.dumps(config, indent=4, sort_keys=True, default=lambda o: str(o)), "\n"
+            f"[ {env.name : <14} ] {counts['files'] : >7} {counts['stored'] : >7} "
+            f"{counts['linked'] : >7} {format_bytes(counts['reclaimed'])}"
         )
+    print()
+    print(f"~~~ reclaimed {format_bytes(total)} {'[dry-run] ' if dry_run else ''}~~~")
 
-    # virtualenv action
-    cmd = virtualenv_cmd(config["dir"], config["force"])
-    print(f"~~~ virtualenv command {'[dry-run] ' if dry_run else ''}~~~")
-    print(" ".join([str(v) for v in cmd]), "\n")
     if not dry_run:
-        subprocess.run(cmd)
-    print()
+        store.mkdir(exist_ok=True)
+        write_json(store / "manifest.json", manifest)
+    return 0
+
+
+def verify_main(config):
+    dry_run = config["dry_run"]
+    root = config["root"]
+    store = root / store_name
+
+    # header
+    print("#" * 80)
+    print(f"### VERIFY - {str(root)}")
+    print("#" * 80, "\n")
+
+    if not store.is_dir():
+        print(f"~~~ no store found at {str(store)}, nothing to verify ~~~")
+        return 0
+
+    manifest = read_store_manifest(store)
+    print(f"~~~ verify {'[dry-run] ' if dry_run else ''}~~~", "\n")
+    counts = verify_store(root, manifest, dry_run)
+    print(" ".join([f"{k}={v}" for k, v in counts.items()]), "\n")
 
-    # pip action
-    cmd = pip_cmd(config["dir"], config["deps"])
-    print(f"~~~ pip command {'[dry-run] ' if dry_run else ''}~~~")
-    print(" ".join(cmd), "\n")
     if not dry_run:
-        subprocess.run(cmd)
+        write_json(store / "manifest.json", manifest)
+    return 1 if counts["corrupt"] else 0
+
+
+def read_state(path, manifest):
+    """completed env names recorded by the previous run of the same manifest"""
+    try:
+        with open(path, mode="rt", encoding="utf8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return set()
+
+    if state.get("manifest") != str(manifest):
+        return set()
+    return {k for k, v in state.get("envs", {}).items() if v in ("ok", "current")}
+
+
+def pack_main(config):
+    start = time.monotonic()
+    dry_run = config["dry_run"]
+
+    # header
+    print("#" * 80)
+    print(f"### PACK - {str(config['env'])} -> {str(config['output'])}")
+    print("#" * 80, "\n")
+
+    print(f"~~~ path dependent files {'[dry-run] ' if dry_run else ''}~~~")
+    print("\n".join([str(v) for v in path_dependent_files(config["env"])]), "\n")
+    if dry_run:
+        return 0
+
+    count = pack_env(config["env"], config["output"], config["jobs"], config["level"])
+    size = format_bytes(config["output"].stat().st_size)
+    print(f"~~~ packed {count} paths in {time.monotonic() - start:.2f} seconds ~~~")
+    print(f"{str(config['output'])} ({size})", "\n")
+    return 0
+
+
+def unpack_main(config):
+    start = time.monotonic()
+    dry_run = config["dry_run"]
+
+    # header
+    print("#" * 80)
+    print(f"### UNPACK - {str(config['archive'])} -> {str(config['dest'])}")
+    print("#" * 80, "\n")
+
+    if dry_run:
+        print("~~~ unpack [dry-run] ~~~", "\n")
+        return 0
+
+    if config["force"] and config["dest"].exists():
+        shutil.rmtree(config["dest"])
+
+    try:
+        manifest = unpack_env(config["archive"], config["dest"])
+    except (OSError, ValueError, tarfile.TarError) as e:
+        print(f"ERROR: unable to unpack [{str(config['archive'])}], {e}")
+        return 1
+
+    print(f"~~~ unpacked in {time.monotonic() - start:.2f} seconds ~~~")
+    print(f"relocated {manifest['prefix']} -> {str(config['dest'])}")
+    print(f"rewritten={len(manifest['files'])} relinked={len(manifest['links'])}")
+    if manifest["home"] and not Path(manifest["home"]).is_dir():
+        print(
+            f"WARNING: base interpreter directory {manifest['home']} not found, "
+            "the env needs the same interpreter it was packed with"
+        )
+    print()
+    return 0
+
+
+def run_envs(
+    envs, dry_run, jobs, profile=False, state_file=None, manifest=None, resume=False
+):
+    """provision each env, concurrently through a worker pool when jobs > 1
+
+    an env starts once all envs it depends on succeeded, envs depending on a
+    failed env are reported as blocked while unrelated envs carry on. with
+    `state_file` set, each env's status is recorded as soon as it completes,
+    `resume` skips envs recorded as completed by the previous run of `manifest`.
+    """
+    state = dict(manifest=str(manifest), envs={})
+    completed = set()
+    if state_file is not None and resume:
+        completed = read_state(state_file, manifest)
+    state_lock = threading.Lock()
+
+    def record(result):
+        if state_file is None or dry_run:
+            return
+        with state_lock:
+            state["envs"][result["name"]] = result["status"]
+            write_json(state_file, state)
+
+    def provision(envconfig):
+        echo = print if jobs == 1 else echo_fn(f"[{envconfig['name']}]")
+        start = time.monotonic()
+        try:
+            clone = envconfig["clone"]
+            if clone is not None and not (envconfig["dir"] / "pyvenv.cfg").exists():
+                src = by_name[clone]["dir"]
+                echo(f"~~~ clone from {clone} {'[dry-run] ' if dry_run else ''}~~~")
+                echo(f"{str(src)} -> {str(envconfig['dir'])}", "\n")
+                if not dry_run:
+                    clone_env(src, envconfig["dir"])
+            result = main(envconfig, dry_run, echo, profile)
+        except Exception as e:
+            echo(f"ERROR: {e}")
+            result = dict(
+                type=envconfig["type"],
+                name=envconfig["name"],
+                status="failed",
+                returncode=-1,
+                seconds=time.monotonic() - start,
+                phases=[],
+            )
+        record(result)
+        return result
+
+    by_name = {env["name"]: env for env in envs}
+    results = {}
+    for env in envs:
+        if env["name"] in completed:
+            results[env["name"]] = dict(
+                type=env["type"],
+                name=env["name"],
+                status="resumed",
+                returncode=0,
+                seconds=0.0,
+                phases=[],
+            )
+            state["envs"][env["name"]] = "ok"
+
+    pending = [env for env in envs if env["name"] not in results]
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for env in list(pending):
+                statuses = [
+                    results.get(dep, {}).get("status") for dep in env["depends"]
+                ]
+                if any(v in ("failed", "blocked") for v in statuses):
+                    pending.remove(env)
+                    results[env["name"]] = dict(
+                        type=env["type"],
+                        name=env["name"],
+                        status="blocked",
+                        returncode=-1,
+                        seconds=0.0,
+                        phases=[],
+                    )
+                    record(results[env["name"]])
+                elif all(v is not None for v in statuses) and len(running) < jobs:
+                    pending.remove(env)
+                    running[pool.submit(provision, env)] = env["name"]
+
+            if not running:
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                results[running.pop(future)] = future.result()
+
+    return [results[env["name"]] for env in envs]
+
+
+def print_summary(results):
+    print("~~~ summary ~~~", "\n")
+    print(f"[ {'ENV_NAME' : <14} ] {'TYPE' : <8} {'STATUS' : <8} {'EXIT' : >4} SECONDS")
+    print("~" * 60)
+    for r in results:
+        print(
+            f"[ {r['name'] : <14} ] {r['type'] : <8} {r['status'] : <8} "
+            f"{r['returncode'] : >4} {r['seconds'] : .2f}"
+        )
+    print()
+
+
+def print_profile(results, profile_file):
+    """print phase timings, append them as json lines to profile_file"""
+    run = datetime.datetime.now().isoformat(timespec="seconds")
+    lines = []
+
+    print("~~~ profile ~~~", "\n")
+    print(f"[ {'ENV_NAME' : <14} ] {'PHASE' : <16} SECONDS")
+    print("~" * 60)
+    for r in results:
+        phases = r["phases"] + [dict(phase="total", seconds=r["seconds"])]
+        for phase in phases:
+            print(
+                f"[ {r['name'] : <14} ] {phase['phase'] : <16} {phase['seconds'] : .3f}"
+            )
+            lines.append(
+                dict(
+                    run=run,
+                    env=r["name"],
+                    type=r["type"],
+                    status=r["status"],
+                    phase=phase["phase"],
+                    seconds=round(phase["seconds"], 6),
+                )
+            )
     print()
 
+    profile_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(profile_file, mode="at", encoding="utf8") as f:
+        for line in lines:
+            f.write(json.dumps(line, sort_keys=True) + "\n")
+    print(f"~~~ profile appended to {str(profile_file)} ~~~", "\n")
+
 
 # exit app when checks fail
 version_check()
+
+# sub-commands, selected by the first cli arg
+if sys.argv[1:2] == ["wheelhouse"]:
+    config = normalize_wheelhouse_config(wheelhouse_parser.parse_args(sys.argv[2:]))
+    sys.exit(wheelhouse_main(config))
+if sys.argv[1:2] == ["clone"]:
+    config = normalize_clone_config(clone_parser.parse_args(sys.argv[2:]))
+    sys.exit(clone_main(config))
+if sys.argv[1:2] == ["dedupe"]:
+    config = normalize_store_config(dedupe_parser.parse_args(sys.argv[2:]))
+    sys.exit(dedupe_main(config))
+if sys.argv[1:2] == ["verify"]:
+    config = normalize_store_config(verify_parser.parse_args(sys.argv[2:]))
+    sys.exit(verify_main(config))
+if sys.argv[1:2] == ["pack"]:
+    config = normalize_pack_config(pack_parser.parse_args(sys.argv[2:]))
+    sys.exit(pack_main(config))
+if sys.argv[1:2] == ["unpack"]:
+    config = normalize_unpack_config(unpack_parser.parse_args(sys.argv[2:]))
+    sys.exit(unpack_main(config))
+
 virtualenv_check()
 
 # exit app on parse_arg fail
 config = normalize_config(parser.parse_args())
 
-# run for each configured env
-for envconfig in config["envs"]:
-    main(envconfig, config["dry_run"])
+# run for each configured env, exit non-zero if any of them failed
+state_file = None if config["manifest"] is None else config["root"] / state_name
+results = run_envs(
+    config["envs"],
+    config["dry_run"],
+    config["jobs"],
+    config["profile"],
+    state_file,
+    config["manifest"],
+    config["resume"],
+)
+print_summary(results)
+if config["profile"]:
+    print_profile(results, config["profile_file"])
+sys.exit(1 if any(r["status"] == "failed" for r in results) else 0)
@@ -1,11 +1,68 @@
 #!/usr/bin/env python3
 
+"""
+command line tool to generate a pyscript application from the pyscript template
+
+the template is rendered in-process, with cookiecutter's rules, when jinja2 (and
+pyyaml, for template config files) can be imported, otherwise generation falls
+back to the `cookiecutter` command
+
+requirements:
+ - python >= 3.6
+ - jinja2 and pyyaml, or cookiecutter available on calling $PATH
+
+run `pyscript-template.py --help` for usage
+run `pyscript-template.py --manifest FILE` to generate many apps listed in a toml file
+run `pyscript-template.py --warm-hooks` to pre-build the pre-commit hook environments
+"""
+
 import argparse
+import copy
+import hashlib
+import json
+import os
 import shutil
 import subprocess
 import sys
+import tempfile
+import time
+import traceback
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+# in-process rendering support, cookiecutter's own dependencies
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None  # type: ignore
+try:
+    import yaml
+except ImportError:
+    yaml = None  # type: ignore
+
+# toml manifest support, stdlib from python 3.11 on
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib  # type: ignore
+    except ImportError:
+        tomllib = None  # type: ignore
+
+# cookiecutter user config, used when --config is not given
+user_config_default = "~/.cookiecutterrc"
+
+# extracted template archives, one directory per archive content hash
+template_cache_default = "~/.cache/pyscript/templates"
+
+# zip comment written by template/scripts/build_archive.py
+archive_comment_prefix = "pyscript-template sha256:"
+
+# hooks run by cookiecutter around generation, see `TemplateRenderer.run_hook`
+hook_names = ["pre_gen_project", "post_gen_project"]
+
 
 # sanity checks
 def version_check():
@@ -24,11 +81,8 @@ def cookiecutter_check():
         sys.exit(1)
 
 
-version_check()
-cookiecutter_check()
-
 parser = argparse.ArgumentParser(prog="pyscript-template")
-parser.add_argument("name", help="pyscript application name")
+parser.add_argument("name", nargs="?", help="pyscript application name")
 parser.add_argument(
     "--path",
     action="store",
@@ -39,31 +93,659 @@ parser.add_argument(
 parser.add_argument(
     "--config", action="store", type=str, help="template configuration file"
 )
-args = parser.parse_args()
-
-_tmpl_config = None
-if args.config is not None:
-    _tmpl_config = Path(args.config).expanduser().resolve()
-    if not _tmpl_config.exists():
-        print(f"ERROR: template config file not found {str(_tmpl_config)}")
-
-config = dict(
-    name=args.name,
-    install_path=Path(args.path).expanduser().resolve(),
-    tmpl_config=_tmpl_config,
-    tmpl=(Path(__file__) / ".." / "template").resolve(),
+parser.add_argument(
+    "--template",
+    metavar="PATH",
+    help="template directory, or archive built by template/scripts/build_archive.py "
+    "which is extracted once into a cache (default: the bundled template)",
+)
+parser.add_argument(
+    "--manifest",
+    metavar="FILE",
+    help="generate every app of a toml manifest, see `manifest_apps`",
+)
+parser.add_argument(
+    "--jobs",
+    "-j",
+    action="store",
+    type=int,
+    metavar="N",
+    default=os.cpu_count() or 1,
+    help="[manifest] generate apps concurrently with N worker processes "
+    "(default: cpu count)",
+)
+parser.add_argument(
+    "--warm-hooks",
+    action="store_true",
+    default=False,
+    help="pre-build the environments of the template's pre-commit hooks into the "
+    "shared pre-commit home generated apps use, then exit",
+)
+parser.add_argument(
+    "--pre-commit-home",
+    metavar="DIR",
+    help="[warm-hooks] pre-commit home to build into (default: the template's "
+    "`pre_commit_home` variable)",
+)
+parser.add_argument(
+    "--wheelhouse",
+    metavar="DIR",
+    help="[warm-hooks] install hook dependencies from wheelhouse DIR, no index "
+    "(see `pyscript-init.py wheelhouse`)",
+)
+parser.add_argument(
+    "--engine",
+    choices=["native", "cookiecutter"],
+    default="native",
+    help="render in-process or with the cookiecutter command, native falls back "
+    "to cookiecutter when jinja2 or pyyaml can't be imported (default: native)",
 )
 
-cmd = ["cookiecutter"]
 
-if config["tmpl_config"] is not None:
-    cmd.append("--config-file")
-    cmd.append(str(config["tmpl_config"]))
+# config processing
+def user_config_path(tmpl_config):
+    """cookiecutter config file in effect, see cookiecutter's get_user_config"""
+    if tmpl_config is not None:
+        return tmpl_config
+    if "COOKIECUTTER_CONFIG" in os.environ:
+        return Path(os.environ["COOKIECUTTER_CONFIG"]).expanduser()
+
+    path = Path(user_config_default).expanduser()
+    return path if path.exists() else None
+
+
+def archive_digest(path):
+    """content hash of a template archive, from its zip comment when present"""
+    with zipfile.ZipFile(path) as zf:
+        comment = zf.comment.decode("utf8", errors="replace")
+    if comment.startswith(archive_comment_prefix):
+        return comment[len(archive_comment_prefix) :]
+
+    # archives from other tools, hash the whole file
+    h = hashlib.sha256()
+    with open(path, mode="rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def extract_template(path, cache):
+    """template directory of an archive, extracted on first use only
+
+    archives are extracted under `cache/<content hash>`, through a temporary
+    directory renamed into place, so concurrent runs never see a partial copy
+    """
+    dest = cache / archive_digest(path)
+    with zipfile.ZipFile(path) as zf:
+        # like cookiecutter, the first entry is the template root directory
+        root = zf.namelist()[0] if zf.namelist() else ""
+        if not root.endswith("/"):
+            print(f"ERROR: [{str(path)}] is not a template archive")
+            sys.exit(1)
+        if (dest / root).is_dir():
+            return dest / root
+
+        cache.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=".extract-", dir=cache))
+        zf.extractall(tmp)
+        # zipfile doesn't restore modes, hooks and copymode rely on them
+        for info in zf.infolist():
+            mode = (info.external_attr >> 16) & 0o777
+            if mode and not info.is_dir():
+                os.chmod(tmp / info.filename, mode)
+
+    try:
+        os.rename(tmp, dest)
+    except OSError:
+        # extracted concurrently by another run
+        shutil.rmtree(tmp, ignore_errors=True)
+    if not (dest / root).is_dir():
+        print(f"ERROR: [{str(dest)}] holds another template, remove it and try again")
+        sys.exit(1)
+    return dest / root
+
+
+def load_manifest(path):
+    if tomllib is None:
+        print("ERROR: --manifest requires python>=3.11 or the tomli package")
+        sys.exit(1)
+
+    try:
+        with open(path, mode="rb") as f:
+            return tomllib.load(f)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: unable to read manifest [{str(path)}], {e}")
+        sys.exit(1)
+
+
+def manifest_apps(manifest, manifest_dir, install_path):
+    """app configs for every `[[apps]]` table of a manifest
+
+    supported keys:
+     - name: pyscript application name, required
+     - path: parent directory, relative to the manifest (default: --path)
+     - any other key overrides the `cookiecutter.json` variable of that name,
+       on top of the manifest's optional `[defaults]` table
+    """
+    apps = []
+    defaults = manifest.get("defaults", {})
+    for i, app in enumerate(manifest.get("apps", [])):
+        if "name" not in app:
+            print(f"ERROR: manifest app #{i + 1} has no name")
+            sys.exit(1)
+
+        path = install_path
+        if "path" in app:
+            path = (manifest_dir / app["path"]).expanduser().resolve()
+
+        overrides = dict(defaults)
+        overrides.update({k: v for k, v in app.items() if k not in ("name", "path")})
+        overrides["project_name"] = app["name"]
+        apps.append(dict(name=app["name"], path=path, overrides=overrides))
+
+    if not apps:
+        print("ERROR: manifest lists no [[apps]]")
+        sys.exit(1)
+    return apps
+
+
+def normalize_config(ns: argparse.Namespace):
+    _tmpl_config = None
+    if ns.config is not None:
+        _tmpl_config = Path(ns.config).expanduser().resolve()
+        if not _tmpl_config.exists():
+            print(f"ERROR: template config file not found {str(_tmpl_config)}")
+
+    engine = ns.engine
+    missing = [] if jinja2 is not None else ["jinja2"]
+    if yaml is None and user_config_path(_tmpl_config) is not None:
+        missing.append("pyyaml")
+    if engine == "native" and missing:
+        print(f"WARNING: {', '.join(missing)} not found, rendering with cookiecutter")
+        engine = "cookiecutter"
+
+    install_path = Path(ns.path).expanduser().resolve()
+    if ns.manifest is not None:
+        manifest_path = Path(ns.manifest).expanduser().resolve()
+        manifest = load_manifest(manifest_path)
+        apps = manifest_apps(manifest, manifest_path.parent, install_path)
+    elif ns.name is not None:
+        apps = [dict(name=ns.name, path=install_path, overrides={})]
+        apps[0]["overrides"]["project_name"] = ns.name
+    elif ns.warm_hooks:
+        apps = []
+    else:
+        print("ERROR: an application name, --manifest or --warm-hooks is required")
+        sys.exit(1)
+
+    if ns.jobs < 1:
+        print(f"ERROR: --jobs must be at least 1, got {ns.jobs}")
+        sys.exit(1)
+
+    tmpl = (Path(__file__) / ".." / "template").resolve()
+    if ns.template is not None:
+        tmpl = Path(ns.template).expanduser().resolve()
+        if not tmpl.exists():
+            print(f"ERROR: template not found {str(tmpl)}")
+            sys.exit(1)
+        if tmpl.is_file():
+            tmpl = extract_template(tmpl, Path(template_cache_default).expanduser())
+
+    pre_commit_home = ns.pre_commit_home
+    if pre_commit_home is None:
+        with open(tmpl / "cookiecutter.json", mode="rt", encoding="utf8") as f:
+            pre_commit_home = json.load(f).get("pre_commit_home")
+        if yaml is not None:
+            default = read_default_context(user_config_path(_tmpl_config))
+            pre_commit_home = default.get("pre_commit_home", pre_commit_home)
+    if pre_commit_home:
+        pre_commit_home = Path(pre_commit_home).expanduser().resolve()
+
+    wheelhouse = ns.wheelhouse
+    if wheelhouse is not None:
+        wheelhouse = Path(wheelhouse).expanduser().resolve()
+        if not (wheelhouse / "wheels").is_dir():
+            print(f"ERROR: no wheelhouse found at [{str(wheelhouse)}]")
+            sys.exit(1)
+
+    return dict(
+        apps=apps,
+        manifest=ns.manifest is not None,
+        jobs=ns.jobs,
+        install_path=install_path,
+        tmpl_config=_tmpl_config,
+        tmpl=tmpl,
+        engine=engine,
+        warm_hooks=ns.warm_hooks,
+        pre_commit_home=pre_commit_home or None,
+        wheelhouse=wheelhouse,
+    )
+
+
+# native rendering
+class RenderError(Exception):
+    pass
+
+
+def read_default_context(path):
+    """`default_context` of a cookiecutter yaml config file"""
+    if path is None:
+        return {}
+    with open(path, mode="rt", encoding="utf8") as f:
+        content = yaml.safe_load(f) or {}
+    return content.get("default_context") or {}
+
+
+def apply_overwrites(variables, overwrites):
+    """cookiecutter's overwrite rules for template variables
+
+    unknown variables are ignored, a choice is moved to the front of its list
+    (the first choice is the default), multi-choices must be a subset
+    """
+    for name, overwrite in overwrites.items():
+        if name not in variables:
+            continue
+
+        value = variables[name]
+        if isinstance(value, list) and isinstance(overwrite, list):
+            if not set(overwrite).issubset(set(value)):
+                raise ValueError(
+                    f"{overwrite} provided for multi-choice variable {name}, "
+                    f"but valid choices are {value}"
+                )
+            variables[name] = overwrite
+        elif isinstance(value, list):
+            if overwrite not in value:
+                raise ValueError(
+                    f"{overwrite} provided for choice variable {name}, "
+                    f"but the choices are {value}."
+                )
+            value.remove(overwrite)
+            value.insert(0, overwrite)
+        elif isinstance(value, dict) and isinstance(overwrite, dict):
+            value.update(overwrite)
+        else:
+            variables[name] = overwrite
+
+
+def is_binary(path):
+    """binary files are copied as is, like cookiecutter's binaryornot check"""
+    with open(path, mode="rb") as f:
+        chunk = f.read(1024)
+    if b"\0" in chunk:
+        return True
+    try:
+        chunk.decode("utf8")
+    except UnicodeDecodeError as e:
+        # a multi-byte character cut off at the end of the chunk is still text
+        return e.start < len(chunk) - 3
+    return False
+
+
+def detect_newline(path):
+    """newline of the file's first line, rendered files keep it"""
+    with open(path, mode="rt", encoding="utf8") as f:
+        f.readline()
+    return f.newlines[0] if isinstance(f.newlines, tuple) else f.newlines
+
+
+def find_project(tmpl):
+    """the template's project directory, named after a cookiecutter variable"""
+    candidates = [
+        p
+        for p in sorted(tmpl.iterdir())
+        if p.is_dir() and "cookiecutter" in p.name and "{{" in p.name
+    ]
+    if not candidates:
+        raise RenderError(f"no project template found in [{str(tmpl)}]")
+    return candidates[0]
+
+
+class TemplateRenderer:
+    """cookiecutter compatible, in-process renderer for a template directory
+
+    `cookiecutter.json`, path names, file contents and hooks are read and
+    compiled once, `render` then generates any number of apps without touching
+    the template again. hooks run as python code in this process, from the
+    generated project directory, like cookiecutter runs them as scripts
+    """
+
+    def __init__(self, tmpl):
+        self.tmpl = Path(tmpl)
+        with open(self.tmpl / "cookiecutter.json", mode="rt", encoding="utf8") as f:
+            self.variables = json.load(f, object_pairs_hook=OrderedDict)
+
+        self.project = find_project(self.tmpl)
+
+        self.env = jinja2.Environment(
+            undefined=jinja2.StrictUndefined,
+            keep_trailing_newline=True,
+            loader=jinja2.FileSystemLoader(
+                [str(self.project), str(self.tmpl / "templates")]
+            ),
+        )
+        self.name = self.env.from_string(self.project.name)
+
+        # (path template, source) for dirs, plus (content, newline) for files
+        self.dirs = []
+        self.files = []
+        for root, dirs, files in os.walk(self.project):
+            dirs.sort()
+            for d in dirs:
+                rel = os.path.relpath(os.path.join(root, d), self.project)
+                self.dirs.append((self.env.from_string(rel), rel))
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                rel = os.path.relpath(path, self.project)
+                content, newline = None, None
+                if not is_binary(path):
+                    content = self.env.get_template(rel.replace(os.path.sep, "/"))
+                    newline = detect_newline(path)
+                self.files.append((self.env.from_string(rel), path, content, newline))
+
+        self.hooks = {}
+        for name in hook_names:
+            path = self.tmpl / "hooks" / f"{name}.py"
+            if path.exists():
+                self.hooks[name] = (path, self.env.from_string(path.read_text("utf8")))
+
+    def render_variable(self, raw, variables):
+        if raw is None or isinstance(raw, bool):
+            return raw
+        if isinstance(raw, dict):
+            return OrderedDict(
+                (
+                    self.render_variable(k, variables),
+                    self.render_variable(v, variables),
+                )
+                for k, v in raw.items()
+            )
+        if isinstance(raw, list):
+            return [self.render_variable(v, variables) for v in raw]
+        return self.env.from_string(str(raw)).render(cookiecutter=variables)
+
+    def context(self, extra, default=None, output_dir=".", template=None):
+        """render context, as built by `cookiecutter --no-input`
+
+        `default` is the config file's default_context, invalid defaults are
+        ignored with a warning, `extra` are the command line overrides
+        """
+        variables = copy.deepcopy(self.variables)
+        if default:
+            try:
+                apply_overwrites(variables, default)
+            except ValueError as e:
+                print(f"WARNING: invalid default received: {e}")
+        apply_overwrites(variables, extra)
+
+        # private variables are kept raw, dicts are rendered last
+        rendered = OrderedDict()
+        for key, raw in variables.items():
+            if key.startswith("_") and not key.startswith("__"):
+                rendered[key] = raw
+            elif isinstance(raw, list) and not key.startswith("__"):
+                rendered[key] = self.render_variable(raw, rendered)[0]
+            elif not isinstance(raw, dict) or key.startswith("__"):
+                rendered[key] = self.render_variable(raw, rendered)
+        for key, raw in variables.items():
+            if isinstance(raw, dict) and not key.startswith("_"):
+                rendered[key] = self.render_variable(raw, rendered)
+
+        original = {k: v for k, v in variables.items() if not k.startswith("_")}
+        rendered["_template"] = str(self.tmpl) if template is None else template
+        rendered["_output_dir"] = os.path.abspath(output_dir)
+        rendered["_repo_dir"] = str(self.tmpl)
+        rendered["_checkout"] = None
+        return {"cookiecutter": rendered, "_cookiecutter": original}
+
+    def run_hook(self, name, project_dir, context):
+        """run a hook's rendered code from project_dir, fail on non-zero exit"""
+        if name not in self.hooks:
+            return
+
+        path, template = self.hooks[name]
+        code = compile(template.render(**context), str(path), "exec")
+        cwd, argv = os.getcwd(), sys.argv
+        os.chdir(project_dir)
+        sys.argv = [str(path)]
+        try:
+            exec(code, {"__name__": "__main__", "__file__": str(path)})
+        except SystemExit as e:
+            if isinstance(e.code, str):
+                print(e.code, file=sys.stderr)
+            if e.code not in (None, 0):
+                raise RenderError(f"{name} hook script failed (exit status: {e.code})")
+        except Exception:
+            traceback.print_exc()
+            raise RenderError(f"{name} hook script failed")
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.chdir(cwd)
+            sys.argv = argv
+
+    def render(self, context, output_dir):
+        """generate the project into output_dir and return its path
+
+        the project directory is removed again when rendering or a hook fails
+        """
+        project_dir = Path(os.path.abspath(output_dir)) / self.name.render(**context)
+        if project_dir.exists():
+            raise RenderError(f'"{str(project_dir)}" directory already exists')
+        project_dir.mkdir(parents=True)
+
+        try:
+            self.run_hook("pre_gen_project", project_dir, context)
+            for name, rel in self.dirs:
+                try:
+                    (project_dir / name.render(**context)).mkdir(exist_ok=True)
+                except jinja2.UndefinedError as e:
+                    raise RenderError(f"unable to create directory '{rel}': {e}")
+
+            for name, path, content, newline in self.files:
+                try:
+                    out = project_dir / name.render(**context)
+                    if out.is_dir():
+                        continue
+                    if content is None:
+                        shutil.copyfile(path, out)
+                    else:
+                        text = content.render(**context)
+                        with open(
+                            out, mode="wt", encoding="utf8", newline=newline
+                        ) as f:
+                            f.write(text)
+                    shutil.copymode(path, out)
+                except jinja2.UndefinedError as e:
+                    rel = os.path.relpath(path, self.project)
+                    raise RenderError(f"unable to create file '{rel}': {e}")
+
+            self.run_hook("post_gen_project", project_dir, context)
+        except RenderError:
+            shutil.rmtree(project_dir, ignore_errors=True)
+            raise
+
+        return project_dir
+
+
+# actions
+_renderer = None
+
+
+def native_main(config, app):
+    """render one app in-process, the template is compiled once per process"""
+    global _renderer
+    try:
+        if _renderer is None:
+            _renderer = TemplateRenderer(config["tmpl"])
+        context = _renderer.context(
+            app["overrides"],
+            read_default_context(user_config_path(config["tmpl_config"])),
+            app["path"],
+            str(config["tmpl"]),
+        )
+        _renderer.render(context, app["path"])
+    except (RenderError, ValueError, jinja2.TemplateError) as e:
+        print(f"ERROR: {e}")
+        return 1
+    return 0
+
+
+def cookiecutter_cmd(config, app):
+    cmd = ["cookiecutter"]
+
+    if config["tmpl_config"] is not None:
+        cmd.append("--config-file")
+        cmd.append(str(config["tmpl_config"]))
+
+    cmd.append("--no-input")
+    cmd.append("--output-dir")
+    cmd.append(str(app["path"]))
+    cmd.append(str(config["tmpl"]))
+    cmd = cmd + [f"{k}={v}" for k, v in app["overrides"].items()]
+    return cmd
+
+
+def generate_app(config, app):
+    if config["engine"] == "cookiecutter":
+        return subprocess.run(cookiecutter_cmd(config, app)).returncode
+    return native_main(config, app)
+
+
+def generate_captured(config, app):
+    """generate an app in a worker process, capturing everything it outputs
+
+    stdout and stderr are redirected at the file descriptor level, so output
+    of hook subprocesses (git, pre-commit) is captured with the app's own
+    """
+    start = time.monotonic()
+    result = dict(name=app["name"], status="ok", returncode=0)
+    with tempfile.TemporaryFile() as out:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved = [os.dup(1), os.dup(2)]
+        os.dup2(out.fileno(), 1)
+        os.dup2(out.fileno(), 2)
+        try:
+            result["returncode"] = generate_app(config, app)
+        except Exception:
+            traceback.print_exc()
+            result["returncode"] = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            for fd in saved:
+                os.close(fd)
+
+        out.seek(0)
+        result["output"] = out.read().decode("utf8", errors="replace")
+
+    if result["returncode"] != 0:
+        result["status"] = "failed"
+    result["seconds"] = time.monotonic() - start
+    return result
+
+
+def manifest_main(config):
+    """generate all apps through a process pool, a failed app doesn't stop others"""
+    results = []
+    sys.stdout.flush()
+    with ProcessPoolExecutor(max_workers=config["jobs"]) as pool:
+        futures = {
+            pool.submit(generate_captured, config, app): app for app in config["apps"]
+        }
+        for future in as_completed(futures):
+            app = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # the worker itself died, nothing was captured
+                result = dict(
+                    name=app["name"],
+                    status="failed",
+                    returncode=1,
+                    seconds=0.0,
+                    output=f"ERROR: {e}\n",
+                )
+            result["path"] = app["path"]
+            results.append(result)
+
+            print(f"~~~ {result['name']} ~~~", "\n")
+            print(result["output"])
+
+    order = [app["name"] for app in config["apps"]]
+    results.sort(key=lambda r: order.index(r["name"]))
+    print_summary(results)
+    return 1 if any(r["status"] == "failed" for r in results) else 0
+
+
+def warm_hooks_cmd(config_file):
+    return ["pre-commit", "install-hooks", "--config", str(config_file)]
+
+
+def warm_hooks_main(config):
+    """build every hook environment of the template's pre-commit config
+
+    environments go to the pre-commit home generated apps use, pre-commit's
+    default unless `pre_commit_home` is set (see post_gen_project.py), so an
+    app's first commit finds them already built.
+    pre-commit keys them by repo, rev and additional dependencies, so hooks
+    already built are reused and only changed revisions are rebuilt
+    """
+    if shutil.which("pre-commit") is None:
+        print("ERROR: pre-commit not found, please install then try again")
+        return 1
+
+    source = find_project(config["tmpl"]) / ".pre-commit-config.yaml"
+    env = dict(os.environ)
+    if config["pre_commit_home"] is not None:
+        env["PRE_COMMIT_HOME"] = str(config["pre_commit_home"])
+    if config["wheelhouse"] is not None:
+        env["PIP_NO_INDEX"] = "1"
+        env["PIP_FIND_LINKS"] = str(config["wheelhouse"] / "wheels")
+
+    print("~~~ pre-commit install-hooks ~~~", "\n")
+    print(f"PRE_COMMIT_HOME={env.get('PRE_COMMIT_HOME', '<pre-commit default>')}")
+    start = time.monotonic()
+    # pre-commit needs a git repo, the config has no template variables
+    with tempfile.TemporaryDirectory(prefix="pyscript-hooks-") as tmp:
+        subprocess.run(["git", "init", "--quiet", tmp])
+        shutil.copyfile(source, Path(tmp) / ".pre-commit-config.yaml")
+        cmd = warm_hooks_cmd(Path(tmp) / ".pre-commit-config.yaml")
+        print(" ".join([str(v) for v in cmd]), "\n")
+        returncode = subprocess.run(cmd, cwd=tmp, env=env).returncode
+
+    status = "ok" if returncode == 0 else "failed"
+    print(f"\nhook environments {status} in {time.monotonic() - start : .2f}s")
+    return returncode
+
+
+def print_summary(results):
+    print("~~~ summary ~~~", "\n")
+    print(f"[ {'APP_NAME' : <14} ] {'STATUS' : <8} {'EXIT' : >4} SECONDS  PATH")
+    print("~" * 60)
+    for r in results:
+        print(
+            f"[ {r['name'] : <14} ] {r['status'] : <8} "
+            f"{r['returncode'] : >4} {r['seconds'] : 7.2f}  {str(r['path'])}"
+        )
+    print()
+
+
+if __name__ == "__main__":
+    version_check()
+
+    config = normalize_config(parser.parse_args())
+
+    if config["warm_hooks"]:
+        sys.exit(warm_hooks_main(config))
+
+    if config["engine"] == "cookiecutter":
+        cookiecutter_check()
 
-cmd.append("--no-input")
-cmd.append("--output-dir")
-cmd.append(str(config["install_path"]))
-cmd.append(str(config["tmpl"]))
-cmd.append(f"project_name={config['name']}")
+    if config["manifest"]:
+        sys.exit(manifest_main(config))
 
-subprocess.run(cmd)
+    sys.exit(generate_app(config, config["apps"][0]))
@@ -14,10 +14,19 @@ run `pyscript-tools.py --help` for usage
 """
 
 import argparse
+import hashlib
 import json
+import os
+import re
+import shlex
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Any, List
 
 # pyscript development env tools
@@ -80,6 +89,15 @@ tools: List[Any] = [
     },
 ]
 
+# local wheel store shared with pyscript-init.py
+wheelhouse_default = "~/.cache/pyscript/wheelhouse"
+
+# last verify result, reused for --ttl seconds
+verify_cache_default = "~/.cache/pyscript/tools-verify.json"
+
+# resolved tool and injected package versions, written after each install
+lockfile_default = "~/.config/pyscript/tools-lock.json"
+
 
 # sanity checks
 def version_check():
@@ -100,7 +118,7 @@ def pipx_check():
 
 # arg parsing
 parser = argparse.ArgumentParser(prog="pyscript-tools")
-valid_ops = ["install", "list", "verify"]
+valid_ops = ["install", "list", "verify", "wheelhouse"]
 parser.add_argument(
     "--dry-run",
     action="store_true",
@@ -112,6 +130,65 @@ parser.add_argument(
     default=False,
     help="ensure tools are reinstalled",
 )
+parser.add_argument(
+    "--jobs",
+    "-j",
+    action="store",
+    type=int,
+    metavar="N",
+    default=1,
+    help="[install] install tools concurrently with N workers, output prefixed by "
+    "tool name (default: 1)",
+)
+parser.add_argument(
+    "--pip-cache",
+    metavar="DIR",
+    default=None,
+    help="pip cache directory shared by all pipx installs (default: pip's own)",
+)
+parser.add_argument(
+    "--offline",
+    action="store_const",
+    dest="wheelhouse",
+    const=wheelhouse_default,
+    help=f"install from the default wheelhouse ({wheelhouse_default}), no index",
+)
+parser.add_argument(
+    "--wheelhouse",
+    metavar="DIR",
+    default=None,
+    help="[install] from wheelhouse DIR with no index, "
+    "[wheelhouse] store wheels for all tools in DIR",
+)
+parser.add_argument(
+    "--group",
+    metavar="CATEGORY",
+    action="append",
+    dest="groups",
+    default=[],
+    help="[install] install tools of CATEGORY into one shared venv, hosted by "
+    "its first tool, apps are exposed as usual (repeatable)",
+)
+parser.add_argument(
+    "--lockfile",
+    metavar="FILE",
+    default=lockfile_default,
+    help=f"[install] pin unpinned tools to the versions in FILE, rewritten after "
+    f"install (default: {lockfile_default})",
+)
+parser.add_argument(
+    "--relock",
+    action="store_true",
+    default=False,
+    help="[install] ignore the lockfile, upgrade unpinned tools and relock",
+)
+parser.add_argument(
+    "--ttl",
+    metavar="SECONDS",
+    type=float,
+    default=60,
+    help="[verify] reuse the cached result for this long, 0 disables (default: 60)",
+)
 parser.add_argument(
     "--category",
     metavar="CATEGORY",
@@ -137,6 +214,16 @@ def normalize_config(ns: argparse.Namespace):
     if ns.tool is not None:
         _tools = [t for t in _tools if t["package"].lower() == ns.tool]
 
+    groups = [g.lower() for g in ns.groups]
+    for group in groups:
+        members = [t for t in tools if t["category"].lower() == group]
+        if not members:
+            print(f"ERROR: unrecognized category [{group}] for --group")
+            sys.exit(1)
+        # grouped tools can only be installed through their host
+        if any(t in _tools for t in members) and members[0] not in _tools:
+            _tools = [t for t in tools if t in _tools or t is members[0]]
+
     if ns.op.lower() not in valid_ops:
         print(
             f"ERROR: unrecognized operation [{ns.op}], "
@@ -144,34 +231,440 @@ def normalize_config(ns: argparse.Namespace):
         )
         sys.exit(1)
 
-    return dict(dry_run=ns.dry_run, force=ns.force, tools=_tools, op=ns.op.lower())
+    wheelhouse = ns.wheelhouse
+    if ns.op.lower() == "wheelhouse" and wheelhouse is None:
+        wheelhouse = wheelhouse_default
+    if wheelhouse is not None:
+        wheelhouse = Path(wheelhouse).expanduser().resolve()
+        if ns.op.lower() == "install" and not (wheelhouse / "wheels").is_dir():
+            print(f"ERROR: no wheelhouse found at [{str(wheelhouse)}]")
+            sys.exit(1)
+
+    if ns.jobs < 1:
+        print(f"ERROR: --jobs must be at least 1, got {ns.jobs}")
+        sys.exit(1)
+
+    pip_cache = ns.pip_cache
+    if pip_cache is not None:
+        pip_cache = Path(pip_cache).expanduser().resolve()
+
+    return dict(
+        dry_run=ns.dry_run,
+        force=ns.force,
+        tools=_tools,
+        op=ns.op.lower(),
+        wheelhouse=wheelhouse,
+        jobs=ns.jobs,
+        pip_cache=pip_cache,
+        ttl=ns.ttl,
+        groups=groups,
+        lockfile=Path(ns.lockfile).expanduser().resolve(),
+        relock=ns.relock,
+        verify_cache=Path(verify_cache_default).expanduser(),
+    )
+
+
+def pipx_home():
+    """pipx data directory, see `pipx environment`"""
+    if "PIPX_HOME" in os.environ:
+        return Path(os.environ["PIPX_HOME"]).expanduser()
+
+    legacy = Path.home() / ".local" / "pipx"
+    if legacy.exists():
+        return legacy
+    return Path.home() / ".local" / "share" / "pipx"
+
+
+# output handling
+_print_lock = threading.Lock()
+
+
+def echo_fn(prefix=None):
+    """return a print-like function, prefixing every output line when set"""
+    if prefix is None:
+        return print
+
+    def echo(*args):
+        text = " ".join([str(v) for v in args])
+        with _print_lock:
+            for line in text.split("\n"):
+                print(f"{prefix} {line}".rstrip())
+            sys.stdout.flush()
+
+    return echo
+
+
+def run_cmd(cmd, echo):
+    """run cmd and return its exit code
+
+    output goes straight to the terminal for plain `print`, otherwise it is
+    captured and passed line by line through `echo`
+    """
+    if echo is print:
+        return subprocess.run(cmd).returncode
+
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+    )
+    for line in proc.stdout:
+        echo(line.rstrip("\n"))
+    return proc.wait()
 
 
 # actions
-def install_cmd(tool, force):
+def tool_spec(tool, version=None):
+    version = version or tool["version"]
+    return f"{tool['package']}{'' if version is None else '==' + version}"
+
+
+def install_cmd(tool, force, wheelhouse=None, version=None):
     cmd = ["pipx", "install", "--include-deps"]
 
     if force:
         cmd.append("--force")
 
-    cmd.append(
-        f"{tool['package']}"
-        f"{'' if tool['version'] is None else '==' + tool['version']}"
-    )
+    if wheelhouse is not None:
+        links = shlex.quote(str(wheelhouse / "wheels"))
+        cmd.append(f"--pip-args=--no-index --find-links {links}")
+
+    cmd.append(tool_spec(tool, version))
+    return cmd
+
+
+def upgrade_cmd(tool, wheelhouse=None):
+    cmd = ["pipx", "upgrade", "--include-injected"]
+
+    if wheelhouse is not None:
+        links = shlex.quote(str(wheelhouse / "wheels"))
+        cmd.append(f"--pip-args=--no-index --find-links {links}")
+
+    cmd.append(tool["package"])
+    return cmd
+
+
+def wheel_cmd(dest, tool, wheelhouse):
+    # previously stored wheels are offered to pip so they are not rebuilt
+    cmd = [
+        sys.executable,
+        "-m",
+        "pip",
+        "wheel",
+        "--wheel-dir",
+        str(dest),
+        "--find-links",
+        str(wheelhouse / "wheels"),
+    ]
+
+    cmd = cmd + [tool_spec(tool)] + tool["inject"]
+    return cmd
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, mode="rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def wheelhouse_add(wheelhouse, path):
+    """store a wheel by content hash, link it into the flat `wheels` directory
+
+    same layout as `pyscript-init.py wheelhouse`, returns (digest, added)
+    """
+    digest = file_digest(path)
+    blob = wheelhouse / "sha256" / digest[:2] / digest
+    link = wheelhouse / "wheels" / path.name
+
+    added = not blob.exists()
+    if added:
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(path), str(blob))
+
+    link.parent.mkdir(parents=True, exist_ok=True)
+    if link.exists() and os.path.samefile(link, blob):
+        return digest, added
+    if link.exists():
+        link.unlink()
+    try:
+        os.link(blob, link)
+    except OSError:
+        shutil.copy2(blob, link)
+
+    return digest, added
+
+
+def write_json(path, content):
+    """write json to path atomically, readers never see a partial file"""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, mode="wt", encoding="utf8") as f:
+        json.dump(content, f, indent=4, sort_keys=True)
+        f.write("\n")
+    os.replace(tmp, path)
+
+
+def inject_cmd(tool, wheelhouse=None, packages=None, force=False, apps=False):
+    cmd = ["pipx", "inject"]
+
+    if force:
+        cmd.append("--force")
+
+    if apps:
+        cmd.append("--include-apps")
+
+    if wheelhouse is not None:
+        links = shlex.quote(str(wheelhouse / "wheels"))
+        cmd.append(f"--pip-args=--no-index --find-links {links}")
+
+    cmd.append(tool["package"])
+    cmd = cmd + (tool["inject"] if packages is None else packages)
     return cmd
 
 
+def uninstall_cmd(venv):
+    return ["pipx", "uninstall", venv]
+
+
 def list_cmd():
     return ["pipx", "list", "--include-injected"]
 
 
-def verify_cmd(tools):
+def canonical_name(name):
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_pipx_metadata(venv, metadata, installed):
+    """add the main and injected packages of one pipx venv to `installed`
+
+    `installed` maps canonical package names to dict(version, venv, injected),
+    `injected` maps the venv's injected packages to their versions. injected
+    packages get an entry of their own, unless installed as a main package,
+    sharing the venv's `injected` (see `--group`)
+    """
+    main = metadata["main_package"]
+    injected = {
+        canonical_name(k): v["package_version"]
+        for k, v in metadata.get("injected_packages", {}).items()
+    }
+    installed[canonical_name(main["package"])] = dict(
+        version=main["package_version"], venv=venv, injected=injected
+    )
+    for name, version in injected.items():
+        installed.setdefault(name, dict(version=version, venv=venv, injected=injected))
+
+
+def read_pipx_metadata():
+    """installed packages of all pipx venvs, see `parse_pipx_metadata`
+
+    reads each venv's pipx_metadata.json directly, falls back to a single
+    `pipx list --json` call when pipx's venvs directory can't be found
+    """
+    installed = {}
+    venvs = pipx_home() / "venvs"
+    if venvs.is_dir():
+        for path in sorted(venvs.glob("*/pipx_metadata.json")):
+            with open(path, mode="rt", encoding="utf8") as f:
+                parse_pipx_metadata(path.parent.name, json.load(f), installed)
+        return installed
+
+    cmd = ["pipx", "list", "--json"]
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, universal_newlines=True)
+    for venv, data in json.loads(proc.stdout or "{}").get("venvs", {}).items():
+        parse_pipx_metadata(venv, data["metadata"], installed)
+    return installed
+
+
+def verify_tools(tools, installed):
+    """compare tools against installed packages, one row per tool
+
+    status is one of ok, missing (not installed), drift (installed version
+    differs from the pinned `version`) or inject (an `inject` package missing)
+    """
+    rows = []
+    for tool in tools:
+        found = installed.get(canonical_name(tool["package"]))
+        injected = {} if found is None else found["injected"]
+        missing_inject = [
+            v for v in tool["inject"] if canonical_name(v) not in injected
+        ]
+
+        status = "ok"
+        if found is None:
+            status = "missing"
+        elif tool["version"] is not None and found["version"] != tool["version"]:
+            status = "drift"
+        elif missing_inject:
+            status = "inject"
+
+        rows.append(
+            dict(
+                package=tool["package"],
+                required=tool["required"],
+                status=status,
+                installed=None if found is None else found["version"],
+                expected=tool["version"],
+                path=shutil.which(tool["package"]),
+            )
+        )
+    return rows
+
+
+def read_lockfile(path):
+    """lockfile content, maps package names to dict(version, inject)"""
+    if not path.exists():
+        return {}
+    with open(path, mode="rt", encoding="utf8") as f:
+        return json.load(f)
+
+
+def lock_tools(tools, installed, lock):
+    """lock with the installed versions of tools and their injected packages"""
+    lock = dict(lock)
     for tool in tools:
-        which_result = shutil.which(tool["package"])
-        print(
-            f"[ { tool['package'] : <14} ] "
-            f"{'NOT_FOUND' if which_result is None else which_result}"
+        found = installed.get(canonical_name(tool["package"]))
+        if found is None:
+            continue
+        inject = {}
+        for name in tool["inject"]:
+            version = found["injected"].get(canonical_name(name))
+            if version is not None:
+                inject[name] = version
+        lock[tool["package"]] = dict(version=found["version"], inject=inject)
+    return lock
+
+
+def version_key(version):
+    """rough ordering key for plan labels, numeric parts compare as numbers"""
+    parts = re.split(r"[.+!-]", version)
+    return [(0, int(v), "") if v.isdigit() else (1, 0, v) for v in parts]
+
+
+def plan_tools(tools, installed, lock, force=False, relock=False):
+    """one install step per tool, bringing it to its pinned or locked version
+
+    `version` pins win over the lockfile, which is ignored on relock. actions:
+    skip (satisfied), install (missing or forced), upgrade / downgrade (version
+    drift), inject (only injected packages missing or drifted) and relock
+    (unpinned, upgraded to latest)
+    """
+    plan = []
+    for tool in tools:
+        locked = {} if relock else lock.get(tool["package"], {})
+        target = tool["version"] or locked.get("version")
+        found = installed.get(canonical_name(tool["package"]))
+        injected = {} if found is None else found["injected"]
+
+        pins = locked.get("inject", {})
+        specs = [
+            n if pins.get(n) is None else f"{n}=={pins[n]}" for n in tool["inject"]
+        ]
+        drifted = []
+        for name, spec in zip(tool["inject"], specs):
+            current = injected.get(canonical_name(name))
+            if current is None or pins.get(name) not in (None, current):
+                drifted.append(spec)
+
+        step = dict(
+            tool=tool,
+            action="skip",
+            installed=None if found is None else found["version"],
+            target=target,
+            inject=drifted,
+            specs=specs,
+            apps=[],
+            uninstall=[],
         )
+        if found is None or force:
+            # a fresh venv, every injected package goes back in
+            step.update(action="install", inject=specs)
+        elif target is not None and found["version"] != target:
+            older = version_key(target) < version_key(found["version"])
+            step.update(action="downgrade" if older else "upgrade", inject=specs)
+        elif relock and tool["version"] is None:
+            step["action"] = "relock"
+        elif drifted:
+            step["action"] = "inject"
+        plan.append(step)
+    return plan
+
+
+def group_plan(plan, installed, groups):
+    """fold the steps of each grouped category into its first tool's step
+
+    the first tool of the category hosts one shared venv, the others are
+    injected into it with their apps exposed. members still in a venv of
+    their own are uninstalled first, then moved into the shared one
+    """
+    for category in groups:
+        steps = [s for s in plan if s["tool"]["category"].lower() == category]
+        if not steps:
+            continue
+
+        host = steps[0]
+        found = installed.get(canonical_name(host["tool"]["package"]))
+        venv = None if found is None else found["venv"]
+        fresh = host["action"] in ("install", "upgrade", "downgrade")
+
+        for step in steps[1:]:
+            found = installed.get(canonical_name(step["tool"]["package"]))
+            moved = found is not None and found["venv"] != venv
+            if step["action"] == "skip" and not (fresh or moved):
+                continue
+
+            if step["action"] == "relock" and not (fresh or moved):
+                # `pipx upgrade --include-injected` on the host covers it
+                if host["action"] == "skip":
+                    host["action"] = "relock"
+            elif step["action"] == "inject" and not (fresh or moved):
+                host["inject"] = host["inject"] + step["inject"]
+            else:
+                host["apps"] = host["apps"] + [tool_spec(step["tool"], step["target"])]
+                host["inject"] = host["inject"] + step["specs"]
+                if moved:
+                    host["uninstall"].append(found["venv"])
+            step.update(action="group", inject=[], host=host["tool"]["package"])
+
+        if host["action"] == "skip" and (host["apps"] or host["inject"]):
+            host["action"] = "inject"
+    return plan
+
+
+def verify_cmd(config):
+    """verify rows for the configured tools, cached for `ttl` seconds
+
+    the cache is keyed by the tool list and the mtime of every venv's
+    pipx_metadata.json, so it is dropped as soon as a venv is added, removed,
+    upgraded or injected into (pipx rewrites the metadata in place, the venvs
+    directory itself is left untouched by upgrades and injects)
+    """
+    venvs = pipx_home() / "venvs"
+    metadata = {}
+    if venvs.is_dir():
+        for path in sorted(venvs.glob("*/pipx_metadata.json")):
+            try:
+                metadata[path.parent.name] = path.stat().st_mtime_ns
+            except OSError:
+                metadata[path.parent.name] = None
+    key = dict(tools=config["tools"], venvs=str(venvs), metadata=metadata)
+
+    cache = config["verify_cache"]
+    if config["ttl"] > 0:
+        try:
+            with open(cache, mode="rt", encoding="utf8") as f:
+                cached = json.load(f)
+            if cached["key"] == key and time.time() - cached["time"] < config["ttl"]:
+                return cached["rows"], True
+        except (OSError, ValueError, KeyError):
+            pass
+
+    rows = verify_tools(config["tools"], read_pipx_metadata())
+    if config["ttl"] > 0:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        write_json(cache, dict(key=key, time=time.time(), rows=rows))
+    return rows, False
 
 
 def main(config):
@@ -189,11 +682,26 @@ def main(config):
 
     # virtualenv action
     if config["op"] == "verify":
-        print(f"~~~ verify {'[dry-run] ' if config['dry_run'] else ''}~~~", "\n")
-        print(f"[ { 'TOOL_NAME' : <14} ] TOOL_PATH")
+        rows, cached = verify_cmd(config)
+        print(
+            f"~~~ verify {'[dry-run] ' if config['dry_run'] else ''}"
+            f"{'[cached] ' if cached else ''}~~~",
+            "\n",
+        )
+        print(f"[ { 'TOOL_NAME' : <14} ] {'STATUS' : <8} {'VERSION' : <20} TOOL_PATH")
         print("~" * 60)
-        verify_cmd(config["tools"])
-        return
+        for row in rows:
+            version = row["installed"] or "-"
+            if row["expected"] is not None and row["expected"] != row["installed"]:
+                version = f"{version} (!={row['expected']})"
+            print(
+                f"[ { row['package'] : <14} ] {row['status'] : <8} {version : <20} "
+                f"{'NOT_FOUND' if row['path'] is None else row['path']}"
+            )
+        print()
+
+        failed = [r for r in rows if r["status"] != "ok" and r["required"]]
+        return 1 if failed else 0
 
     if config["op"] == "list":
         print(f"~~~ pipx list {'[dry-run] ' if config['dry_run'] else ''}~~~", "\n")
@@ -204,21 +712,211 @@ def main(config):
         return
 
     if config["op"] == "install":
+        print(f"~~~ pipx plan {'[dry-run] ' if config['dry_run'] else ''}~~~", "\n")
+        lock = read_lockfile(config["lockfile"])
+        installed = read_pipx_metadata()
+        plan = plan_tools(
+            config["tools"],
+            installed,
+            lock,
+            config["force"],
+            config["relock"],
+        )
+        plan = group_plan(plan, installed, config["groups"])
+        print_plan(plan)
+
         print(f"~~~ pipx install {'[dry-run] ' if config['dry_run'] else ''}~~~")
-        for tool in config["tools"]:
-            cmd = install_cmd(tool, config["force"])
+        results = install_tools(config, plan)
+        print_summary(results)
+        if config["dry_run"]:
+            return
+
+        # lock what actually got installed, failed steps keep their old entry
+        if any(r["status"] != "skipped" for r in results):
+            installed = read_pipx_metadata()
+            if config["verify_cache"].exists():
+                config["verify_cache"].unlink()
+        new_lock = lock_tools(config["tools"], installed, lock)
+        if new_lock != lock:
+            config["lockfile"].parent.mkdir(parents=True, exist_ok=True)
+            write_json(config["lockfile"], new_lock)
+            print(f"lockfile written to [{str(config['lockfile'])}]", "\n")
+        return 1 if any(r["status"] == "failed" for r in results) else 0
+
+    if config["op"] == "wheelhouse":
+        return wheelhouse_main(config)
+
+
+def install_tool(step, config, echo=print):
+    """run one plan step, pipx install / upgrade a tool, then inject packages"""
+    start = time.monotonic()
+    tool = step["tool"]
+    result = dict(
+        package=tool["package"], action=step["action"], status="ok", returncode=0
+    )
+
+    steps = [uninstall_cmd(venv) for venv in step["uninstall"]]
+    if step["action"] == "install":
+        steps.append(
+            install_cmd(tool, config["force"], config["wheelhouse"], step["target"])
+        )
+    elif step["action"] in ("upgrade", "downgrade"):
+        steps.append(install_cmd(tool, True, config["wheelhouse"], step["target"]))
+    elif step["action"] == "relock":
+        steps.append(upgrade_cmd(tool, config["wheelhouse"]))
+    # grouped tools go in with their apps, their own `inject` packages after
+    force = step["action"] == "inject"
+    if step["apps"]:
+        steps.append(
+            inject_cmd(tool, config["wheelhouse"], step["apps"], force, apps=True)
+        )
+    if step["inject"]:
+        steps.append(inject_cmd(tool, config["wheelhouse"], step["inject"], force))
+
+    for cmd in steps:
+        echo(" ".join([str(v) for v in cmd]), "\n")
+        if not config["dry_run"]:
+            result["returncode"] = run_cmd(cmd, echo)
+        echo()
+        if result["returncode"] != 0:
+            result["status"] = "failed"
+            break
+
+    if config["dry_run"]:
+        result["status"] = "dry-run"
+    result["seconds"] = time.monotonic() - start
+    return result
+
+
+def install_tools(config, plan):
+    """run the plan's steps, concurrently through a worker pool when jobs > 1
+
+    satisfied tools are skipped without calling pipx. pipx creates its shared
+    library venv on first use, when it doesn't exist yet the first step is run
+    on its own so installs don't race on it
+    """
+    jobs = config["jobs"]
+    if config["pip_cache"] is not None:
+        os.environ["PIP_CACHE_DIR"] = str(config["pip_cache"])
+
+    def install(step):
+        echo = print if jobs == 1 else echo_fn(f"[{step['tool']['package']}]")
+        return install_tool(step, config, echo)
+
+    # grouped tools are installed by their host's step
+    idle = dict(skip="skipped", group="grouped")
+    results = [
+        dict(
+            package=step["tool"]["package"],
+            action=step["action"],
+            status=idle[step["action"]],
+            returncode=0,
+            seconds=0.0,
+        )
+        for step in plan
+        if step["action"] in idle
+    ]
+    steps = [step for step in plan if step["action"] not in idle]
+    if jobs == 1 or config["dry_run"]:
+        results = results + [install(step) for step in steps]
+    else:
+        if steps and not (pipx_home() / "shared").exists():
+            results.append(install(steps.pop(0)))
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = results + list(pool.map(install, steps))
+
+    # grouped tools succeed or fail with their host's step
+    by_package = dict((r["package"], r) for r in results)
+    for step in plan:
+        host = by_package.get(step.get("host"))
+        if host is not None:
+            result = by_package[step["tool"]["package"]]
+            result.update(status=host["status"], returncode=host["returncode"])
+
+    order = [step["tool"]["package"] for step in plan]
+    return sorted(results, key=lambda r: order.index(r["package"]))
+
+
+def print_plan(plan):
+    print(f"[ {'TOOL_NAME' : <14} ] {'ACTION' : <9} {'INSTALLED' : <12} TARGET")
+    print("~" * 60)
+    for step in plan:
+        target = step["target"] or "latest"
+        if step["apps"] or step["inject"]:
+            target = f"{target} +{','.join(step['apps'] + step['inject'])}"
+        if "host" in step:
+            target = f"{target} (in {step['host']})"
+        print(
+            f"[ {step['tool']['package'] : <14} ] {step['action'] : <9} "
+            f"{step['installed'] or '-' : <12} {target}"
+        )
+    print()
+
+
+def print_summary(results):
+    print("~~~ summary ~~~", "\n")
+    print(
+        f"[ {'TOOL_NAME' : <14} ] {'ACTION' : <9} {'STATUS' : <8} {'EXIT' : >4} "
+        "SECONDS"
+    )
+    print("~" * 60)
+    for r in results:
+        print(
+            f"[ {r['package'] : <14} ] {r['action'] : <9} {r['status'] : <8} "
+            f"{r['returncode'] : >4} {r['seconds'] : .2f}"
+        )
+    print()
+
+
+def wheelhouse_main(config):
+    wheelhouse = config["wheelhouse"]
+    index_path = wheelhouse / "index.json"
+    index = {}
+    if index_path.exists():
+        with open(index_path, mode="rt", encoding="utf8") as f:
+            index = json.load(f)
+
+    # each tool resolves on its own, just like its pipx venv
+    returncode = 0
+    for tool in config["tools"]:
+        with tempfile.TemporaryDirectory(prefix="pyscript-wheels-") as tmp:
+            cmd = wheel_cmd(tmp, tool, wheelhouse)
+            print(
+                f"~~~ {tool['package']} pip wheel "
+                f"{'[dry-run] ' if config['dry_run'] else ''}~~~"
+            )
             print(" ".join([str(v) for v in cmd]), "\n")
-            if not config["dry_run"]:
-                subprocess.run(cmd)
+            if config["dry_run"]:
+                continue
+
+            (wheelhouse / "wheels").mkdir(parents=True, exist_ok=True)
+            result = subprocess.run(cmd).returncode
+            if result != 0:
+                returncode = result
+                continue
+
             print()
-        return
+            for whl in sorted(Path(tmp).glob("*.whl")):
+                digest, added = wheelhouse_add(wheelhouse, whl)
+                index[whl.name] = digest
+                status = "added" if added else "exists"
+                print(f"[ {status : <6} ] {digest[:12]} {whl.name}")
+            print()
+
+    if not config["dry_run"] and index:
+        write_json(index_path, index)
+    return returncode
 
 
 # exit app when checks fail
 version_check()
-pipx_check()
 
 # exit app on parse_arg fail
 config = normalize_config(parser.parse_args())
 
-main(config)
+# building a wheelhouse doesn't use pipx
+if config["op"] != "wheelhouse":
+    pipx_check()
+
+sys.exit(main(config))
@@ -1,6 +1,80 @@
+import os
 import shutil
+import stat
 import subprocess
 
+
+def write_envrc(home):
+    """project .envrc exporting an overridden pre-commit home
+
+    optional, only needed when `pre_commit_home` isn't pre-commit's default,
+    loaded by direnv (or `source .envrc`), PRE_COMMIT_HOME set by the caller
+    still wins. A leading ~ is written as $HOME so the file stays portable
+    """
+    if home.startswith("~/"):
+        home = "$HOME/" + home[2:]
+    with open(".envrc", mode="wt", encoding="utf8") as f:
+        f.write("# shared pre-commit hook environments, see README.md\n")
+        f.write('export PRE_COMMIT_HOME="${PRE_COMMIT_HOME:-' + home + '}"\n')
+
+
+def quote_path(path):
+    """fast-import path, c-style quoted when it can't be given as is"""
+    if not (path.startswith('"') or "\n" in path):
+        return path
+    escaped = path.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+def fast_import(branch, message):
+    """write the initial commit of all untracked, not ignored files
+
+    one `git fast-import` stream holds every blob and the commit, no index
+    is built and no hooks run, `git reset` then syncs the index to the commit.
+    returns False when git has no identity to commit with
+    """
+    idents = []
+    for var in ("GIT_AUTHOR_IDENT", "GIT_COMMITTER_IDENT"):
+        proc = subprocess.run(
+            ["git", "var", var], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        if proc.returncode != 0:
+            return False
+        idents.append(proc.stdout.decode("utf8").strip())
+
+    cmd = ["git", "ls-files", "--others", "--exclude-standard", "-z"]
+    listing = subprocess.run(cmd, stdout=subprocess.PIPE, check=True).stdout
+    paths = sorted(p for p in listing.decode("utf8").split("\0") if p)
+
+    proc = subprocess.Popen(["git", "fast-import", "--quiet"], stdin=subprocess.PIPE)
+    files = []
+    for mark, path in enumerate(paths, start=1):
+        st = os.lstat(path)
+        if stat.S_ISLNK(st.st_mode):
+            mode, data = "120000", os.readlink(path).encode("utf8")
+        else:
+            mode = "100755" if st.st_mode & stat.S_IXUSR else "100644"
+            with open(path, mode="rb") as f:
+                data = f.read()
+        proc.stdin.write(b"blob\nmark :%d\ndata %d\n" % (mark, len(data)))
+        proc.stdin.write(data + b"\n")
+        files.append(f"M {mode} :{mark} {quote_path(path)}\n")
+
+    message = message.encode("utf8")
+    commit = f"commit refs/heads/{branch}\n"
+    commit += f"author {idents[0]}\ncommitter {idents[1]}\n"
+    proc.stdin.write(commit.encode("utf8"))
+    proc.stdin.write(b"data %d\n" % len(message) + message + b"\n")
+    proc.stdin.write("".join(files).encode("utf8") + b"\n")
+    proc.stdin.close()
+    if proc.wait() != 0:
+        return False
+
+    subprocess.run(["git", "reset", "--quiet"], check=True)
+    print(f"[{branch}] initial commit, {len(paths)} files")
+    return True
+
+
 print("post_gen_project script...")
 
 if "{{ cookiecutter.install_vscode_project }}" == "no":
@@ -10,19 +84,38 @@ if "{{ cookiecutter.install_vscode_project }}" == "no":
 print("setting up project .gitignore...")
 shutil.move(".gitignore.tmpl", ".gitignore")
 
+# hook environments shared by all apps, see `--warm-hooks`. empty is
+# pre-commit's own default home, used by every app without any setup.
+# this script may run inside the generator process, so the environment is
+# passed to the hook commands instead of set on os.environ
+hook_env = dict(os.environ)
+pre_commit_home = "{{ cookiecutter.pre_commit_home }}"
+if pre_commit_home and "{{ cookiecutter.install_pre_commit_hooks }}" == "yes":
+    print(f"using pre-commit home {pre_commit_home} (see .envrc)...")
+    write_envrc(pre_commit_home)
+    hook_env["PRE_COMMIT_HOME"] = os.path.expanduser(pre_commit_home)
+
 if shutil.which("git") is not None:
     print("initializing git repo...")
     subprocess.run(["git", "init", "--quiet", "--initial-branch=develop"])
-    subprocess.run(["git", "add", "."])
+
+    # fast: commit in one fast-import stream, hooks installed afterwards so
+    # they don't run over the fresh tree. commit: git add + git commit
+    committed = False
+    if "{{ cookiecutter.git_bootstrap }}" == "fast":
+        committed = fast_import("develop", "initial commit")
+    if not committed:
+        subprocess.run(["git", "add", "."])
 
     # git is required to run pre-commit checks
     if shutil.which("pre-commit") is not None:
         if "{{ cookiecutter.install_pre_commit_hooks }}" == "yes":
             print("installing pre-commit hooks...")
-            subprocess.run(["pre-commit", "install"])
+            subprocess.run(["pre-commit", "install"], env=hook_env)
     else:
         print("no pre-commit command found, skipping pre-commit checks...")
 
-    subprocess.run(["git", "commit", "-m", "initial commit"])
+    if not committed:
+        subprocess.run(["git", "commit", "-m", "initial commit"], env=hook_env)
 else:
     print("no git command found, skipping git and pre-commit init...")
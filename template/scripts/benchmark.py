@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+
+"""
+end-to-end generation benchmark for the pyscript template
+
+Generates N apps with `pyscript-template.py`'s in-process renderer and breaks
+the time of each one down by phase:
+
+ - context: building the render context from cookiecutter.json
+ - pre_gen: the pre_gen_project.py hook
+ - render: rendering paths and file contents
+ - post_gen: the post_gen_project.py hook, minus its git and pre-commit calls
+ - git, pre_commit: time spent in those commands, called from the hooks
+ - total: the whole generation of one app
+
+plus one-off costs: `compile` (loading and compiling the template), and the
+startup of `pyscript-template.py` and of the `cookiecutter` command.
+
+Runs are controlled: git runs with an isolated config and a fixed identity,
+pre-commit is replaced by a local stand-in that only writes the git hook
+(--real-pre-commit to time the real one), and HOME points to a scratch dir
+so user config (~/.cookiecutterrc, ~/.gitconfig) doesn't leak in.
+
+Results are written as JSON (median, mean, p95 and total per phase) and
+compared against a stored baseline, the run fails when a phase's median
+regressed by more than --tolerance. The baseline is machine specific, it's
+created with --save-baseline on the reference machine and committed, a run
+without one fails instead of passing without any comparison.
+
+requirements:
+ - python >= 3.6
+ - jinja2 and pyyaml, see pyscript-template.py
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+template_default = Path(__file__).resolve().parent.parent
+script_default = template_default.parent / "pyscript-template.py"
+output_default = template_default / "build" / "benchmark.json"
+baseline_default = template_default / "scripts" / "benchmark.baseline.json"
+
+phase_names = ["context", "pre_gen", "render", "post_gen", "git", "pre_commit"]
+
+# stand-in for the pre-commit command, `install` writes a hook like the real one
+pre_commit_stub = """#!/bin/sh
+if [ "$1" = "install" ]; then
+    printf '#!/usr/bin/env bash\\nexit 0\\n' > .git/hooks/pre-commit
+    chmod +x .git/hooks/pre-commit
+    echo "pre-commit installed at .git/hooks/pre-commit"
+fi
+exit 0
+"""
+
+parser = argparse.ArgumentParser(prog="benchmark")
+parser.add_argument(
+    "--count",
+    "-n",
+    type=int,
+    default=20,
+    metavar="N",
+    help="number of apps to generate (default: 20)",
+)
+parser.add_argument(
+    "--template",
+    metavar="DIR",
+    default=str(template_default),
+    help="template directory (default: this template)",
+)
+parser.add_argument(
+    "--script",
+    metavar="FILE",
+    default=str(script_default),
+    help="pyscript-template.py to benchmark (default: next to the template)",
+)
+parser.add_argument(
+    "--real-pre-commit",
+    action="store_true",
+    default=False,
+    help="time the real pre-commit command instead of the local stand-in",
+)
+parser.add_argument(
+    "--output",
+    metavar="FILE",
+    default=str(output_default),
+    help="results file (default: build/benchmark.json)",
+)
+parser.add_argument(
+    "--baseline",
+    metavar="FILE",
+    default=str(baseline_default),
+    help="baseline results to compare with (default: scripts/benchmark.baseline.json)",
+)
+parser.add_argument(
+    "--save-baseline",
+    action="store_true",
+    default=False,
+    help="store this run's results as the baseline",
+)
+parser.add_argument(
+    "--tolerance",
+    type=float,
+    default=0.25,
+    metavar="RATIO",
+    help="allowed slowdown of a phase's median against the baseline (default: 0.25)",
+)
+
+
+def load_script(path):
+    """import pyscript-template.py as a module, its cli only runs as __main__"""
+    spec = importlib.util.spec_from_file_location("pyscript_template", str(path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if module.jinja2 is None or module.yaml is None:
+        print("ERROR: the benchmark requires jinja2 and pyyaml")
+        sys.exit(1)
+    return module
+
+
+@contextlib.contextmanager
+def quiet():
+    """silence stdout and stderr at the file descriptor level, subprocesses too"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(1), os.dup(2)]
+    with open(os.devnull, mode="wb") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        os.dup2(devnull.fileno(), 2)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved[0], 1)
+            os.dup2(saved[1], 2)
+            for fd in saved:
+                os.close(fd)
+
+
+@contextlib.contextmanager
+def timed_commands(timings):
+    """add the run time of every git and pre-commit process to `timings`"""
+    base = subprocess.Popen
+
+    class TimedPopen(base):  # type: ignore
+        def __init__(self, args, *a, **kw):
+            cmd = args if isinstance(args, (list, tuple)) else [args]
+            self._phase = Path(str(cmd[0])).name.replace("-", "_")
+            self._start = time.perf_counter()
+            super().__init__(args, *a, **kw)
+
+        def wait(self, timeout=None):
+            done = self.returncode is not None
+            returncode = super().wait(timeout)
+            if not done and self._phase in timings:
+                timings[self._phase] += time.perf_counter() - self._start
+            return returncode
+
+    subprocess.Popen = TimedPopen  # type: ignore
+    try:
+        yield
+    finally:
+        subprocess.Popen = base  # type: ignore
+
+
+def controlled_env(scratch, real_pre_commit):
+    """isolate this process' environment, hooks and commands inherit it"""
+    home = scratch / "home"
+    home.mkdir()
+    bin_dir = scratch / "bin"
+    bin_dir.mkdir()
+    if not real_pre_commit:
+        stub = bin_dir / "pre-commit"
+        stub.write_text(pre_commit_stub)
+        stub.chmod(0o755)
+
+    os.environ.update(
+        HOME=str(home),
+        PATH=f"{str(bin_dir)}{os.pathsep}{os.environ.get('PATH', '')}",
+        GIT_CONFIG_NOSYSTEM="1",
+        GIT_CONFIG_GLOBAL=os.devnull,
+        GIT_AUTHOR_NAME="Benchmark",
+        GIT_AUTHOR_EMAIL="benchmark@example.com",
+        GIT_COMMITTER_NAME="Benchmark",
+        GIT_COMMITTER_EMAIL="benchmark@example.com",
+    )
+    os.environ.pop("COOKIECUTTER_CONFIG", None)
+    os.environ.pop("PRE_COMMIT_HOME", None)
+
+
+def startup_seconds(cmd, runs=3):
+    """median wall time of a command, None when it can't be run"""
+    if shutil.which(cmd[0]) is None:
+        return None
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def generate(renderer, name, output_dir):
+    """generate one app, returns its per-phase timings"""
+    timings = {phase: 0.0 for phase in phase_names}
+    hooks = {}
+    run_hook = renderer.run_hook
+
+    def timed_hook(hook, project_dir, context):
+        start = time.perf_counter()
+        try:
+            run_hook(hook, project_dir, context)
+        finally:
+            hooks[hook] = time.perf_counter() - start
+
+    renderer.run_hook = timed_hook
+    start = time.perf_counter()
+    try:
+        with quiet(), timed_commands(timings):
+            context = renderer.context(
+                dict(project_name=name), {}, output_dir, str(renderer.tmpl)
+            )
+            timings["context"] = time.perf_counter() - start
+            renderer.render(context, output_dir)
+    finally:
+        del renderer.run_hook
+
+    timings["total"] = time.perf_counter() - start
+    timings["pre_gen"] = hooks.get("pre_gen_project", 0.0)
+    post_gen = hooks.get("post_gen_project", 0.0)
+    timings["post_gen"] = max(post_gen - timings["git"] - timings["pre_commit"], 0.0)
+    timings["render"] = (
+        timings["total"] - timings["context"] - timings["pre_gen"] - post_gen
+    )
+    return timings
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return dict(
+        median=statistics.median(ordered),
+        mean=statistics.mean(ordered),
+        p95=ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        total=sum(ordered),
+    )
+
+
+def run(ns):
+    template = Path(ns.template).expanduser().resolve()
+    script_path = Path(ns.script).expanduser().resolve()
+    script = load_script(script_path)
+
+    results = dict(
+        meta=dict(
+            count=ns.count,
+            python=platform.python_version(),
+            platform=platform.platform(),
+            real_pre_commit=ns.real_pre_commit,
+            time=time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        ),
+        once={},
+        phases={},
+    )
+
+    with tempfile.TemporaryDirectory(prefix="pyscript-benchmark-") as tmp:
+        scratch = Path(tmp)
+        controlled_env(scratch, ns.real_pre_commit)
+
+        results["once"]["script_startup"] = startup_seconds(
+            [sys.executable, str(script_path), "--help"]
+        )
+        results["once"]["cookiecutter_startup"] = startup_seconds(
+            ["cookiecutter", "--version"]
+        )
+
+        start = time.perf_counter()
+        renderer = script.TemplateRenderer(template)
+        results["once"]["compile"] = time.perf_counter() - start
+
+        # first generation warms imports and os caches, it isn't counted
+        generate(renderer, "Bench Warmup", scratch / "warmup")
+        samples = {phase: [] for phase in phase_names + ["total"]}
+        for i in range(ns.count):
+            timings = generate(renderer, f"Bench App {i}", scratch / "out")
+            for phase, seconds in timings.items():
+                samples[phase].append(seconds)
+
+    results["phases"] = {k: summarize(v) for k, v in samples.items()}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """print phases against the baseline, returns the regressed phase names"""
+    print(f"[ {'PHASE' : <20} ] {'MEDIAN_MS' : >9} {'BASE_MS' : >9} CHANGE")
+    print("~" * 60)
+
+    regressed = []
+    rows = [(k, v["median"]) for k, v in results["phases"].items()]
+    rows += [(k, v) for k, v in results["once"].items()]
+    for phase, seconds in rows:
+        base = baseline.get("phases", {}).get(phase, {}).get("median")
+        if base is None:
+            base = baseline.get("once", {}).get(phase)
+
+        change = "-"
+        if seconds is not None and base:
+            ratio = seconds / base - 1
+            change = f"{ratio:+.0%}"
+            # sub-millisecond phases are too noisy to fail on
+            if ratio > tolerance and seconds - base > 0.001:
+                change += " REGRESSED"
+                regressed.append(phase)
+
+        current = "-" if seconds is None else f"{seconds * 1000 : .1f}"
+        previous = "-" if base is None else f"{base * 1000 : .1f}"
+        print(f"[ {phase : <20} ] {current : >9} {previous : >9} {change}")
+    print()
+    return regressed
+
+
+def main(ns):
+    if ns.count < 1:
+        print(f"ERROR: --count must be at least 1, got {ns.count}")
+        return 1
+
+    print(f"~~~ generating {ns.count} apps ~~~", "\n")
+    results = run(ns)
+
+    output = Path(ns.output).expanduser()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=4, sort_keys=True) + "\n")
+    print(f"results written to [{str(output)}]", "\n")
+
+    baseline_path = Path(ns.baseline).expanduser()
+    baseline = {}
+    if baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+
+    regressed = compare(results, baseline, ns.tolerance)
+    if ns.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(output, baseline_path)
+        print(f"baseline written to [{str(baseline_path)}]", "\n")
+        return 0
+
+    if not baseline:
+        print(f"ERROR: no baseline at [{str(baseline_path)}], nothing compared")
+        print("run with --save-baseline on the reference machine to create it")
+        return 1
+    if regressed:
+        print(f"ERROR: regressed beyond {ns.tolerance:.0%}: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parser.parse_args()))
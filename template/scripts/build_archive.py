@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+"""
+simple packaging script for cookiecutter template
+
+Packages the template directory into `build/pyscript.template.zip`. Optionally
+copies zip file to $DEPLOY_PATH (~/bin). Template is usable by the cookiecutter
+command as `cookiecutter $DEPLOY_PATH/pyscript.template.zip`, or by
+`pyscript-template.py --template`, which extracts it once into a cache keyed by
+the archive's content hash.
+
+The archive is deterministic: entries are sorted, with fixed timestamps and
+modes, so an unchanged template always packs to the same bytes. Small text
+files are stored uncompressed, everything else is deflated. A manifest of every
+file's sha256 is stored as `.pyscript-archive.json` in the template root, its
+digest is also written to the zip comment so it can be read without inflating
+anything.
+
+requirements:
+ - python >= 3.6
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import stat
+import sys
+import zipfile
+from pathlib import Path
+
+archive_name = "pyscript.template.zip"
+manifest_name = ".pyscript-archive.json"
+comment_prefix = "pyscript-template sha256:"
+
+# text files up to this size are stored uncompressed
+store_limit_default = 16 * 1024
+
+# fixed entry timestamp, the earliest a zip file can hold
+zip_epoch = (1980, 1, 1, 0, 0, 0)
+
+# skipped at the template root, and anywhere in the tree
+exclude_root = {".git", "build", "scripts", ".gitignore", ".mypy_cache"}
+exclude_any = {".DS_Store", "__pycache__"}
+exclude_suffixes = (".pyc", ".pyo")
+
+parser = argparse.ArgumentParser(prog="build_archive")
+parser.add_argument(
+    "deploy",
+    nargs="?",
+    default="no",
+    help="copy the archive to --deploy-path when one of [deploy,yes,y]",
+)
+parser.add_argument(
+    "--deploy-path",
+    metavar="DIR",
+    default="~/bin",
+    help="deploy directory (default: ~/bin)",
+)
+parser.add_argument(
+    "--store-limit",
+    metavar="BYTES",
+    type=int,
+    default=store_limit_default,
+    help=f"store text files up to BYTES uncompressed (default: {store_limit_default})",
+)
+
+
+def header(title):
+    print(f"=====[ {title : <30} ]" + "=" * 41)
+
+
+def find_target():
+    """template directory, the one holding cookiecutter.json
+
+    can be run from the template directory, one level deeper (ex. scripts dir)
+    or from anywhere, relative to this script
+    """
+    for path in [Path.cwd() / "..", Path.cwd(), Path(__file__).parent / ".."]:
+        if (path / "cookiecutter.json").is_file():
+            return path.resolve()
+    print("ERROR cant find target directory with cookiecutter.json file")
+    sys.exit(1)
+
+
+def is_text(data):
+    if b"\0" in data:
+        return False
+    try:
+        data.decode("utf8")
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def template_entries(target):
+    """sorted (archive path, file path, mode) for every dir and file to pack"""
+    entries = []
+    for root, dirs, files in os.walk(target):
+        rel_root = Path(root).relative_to(target)
+        dirs[:] = sorted(
+            d
+            for d in dirs
+            if d not in exclude_any
+            and not (rel_root == Path(".") and d in exclude_root)
+        )
+        for name in dirs:
+            path = Path(root) / name
+            entries.append((f"{path.relative_to(target).as_posix()}/", path, 0o755))
+        for name in sorted(files):
+            if name in exclude_any or name.endswith(exclude_suffixes):
+                continue
+            if rel_root == Path(".") and name in exclude_root:
+                continue
+            path = Path(root) / name
+            mode = 0o755 if os.stat(path).st_mode & stat.S_IXUSR else 0o644
+            entries.append((path.relative_to(target).as_posix(), path, mode))
+    return sorted(entries, key=lambda e: e[0])
+
+
+def build_manifest(target, entries):
+    """per-file sha256, size and mode, plus a digest over all of them
+
+    the digest covers the root directory name too, archives are extracted
+    under it, so equal content under another name is another archive
+    """
+    files = []
+    digest = hashlib.sha256(f"{target.name}/\n".encode("utf8"))
+    for name, path, mode in entries:
+        if name.endswith("/"):
+            continue
+        content = path.read_bytes()
+        sha256 = hashlib.sha256(content).hexdigest()
+        files.append(dict(path=name, sha256=sha256, size=len(content), mode=mode))
+        digest.update(f"{mode:o} {sha256} {name}\n".encode("utf8"))
+    return dict(name=target.name, digest=digest.hexdigest(), files=files)
+
+
+def zip_entry(name, mode, is_dir=False):
+    info = zipfile.ZipInfo(name, date_time=zip_epoch)
+    info.create_system = 3
+    info.external_attr = ((stat.S_IFDIR if is_dir else stat.S_IFREG) | mode) << 16
+    if is_dir:
+        info.external_attr |= 0x10
+    return info
+
+
+def write_archive(target, dest, store_limit):
+    entries = template_entries(target)
+    manifest = build_manifest(target, entries)
+    root = f"{target.name}/"
+
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    with zipfile.ZipFile(tmp, mode="w") as zf:
+        # cookiecutter expects the template root as the first entry
+        zf.writestr(zip_entry(root, 0o755, is_dir=True), b"")
+
+        info = zip_entry(root + manifest_name, 0o644)
+        content = json.dumps(manifest, indent=4, sort_keys=True) + "\n"
+        zf.writestr(info, content.encode("utf8"), compress_type=zipfile.ZIP_DEFLATED)
+
+        for name, path, mode in entries:
+            if name.endswith("/"):
+                zf.writestr(zip_entry(root + name, mode, is_dir=True), b"")
+                continue
+
+            data = path.read_bytes()
+            compress = zipfile.ZIP_DEFLATED
+            if len(data) <= store_limit and is_text(data):
+                compress = zipfile.ZIP_STORED
+            zf.writestr(zip_entry(root + name, mode), data, compress_type=compress)
+
+        zf.comment = f"{comment_prefix}{manifest['digest']}".encode("utf8")
+    os.replace(tmp, dest)
+    return manifest
+
+
+def deploy(archive, deploy_path):
+    dest = deploy_path / archive.name
+    if dest.exists():
+        answer = input(f"overwrite '{str(dest)}'? [y/N] ")
+        if answer.strip().lower() not in ("y", "yes"):
+            return
+    deploy_path.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(archive, dest)
+
+
+def main(ns):
+    target = find_target()
+    build = target / "build"
+
+    header("Resetting build Directory")
+    shutil.rmtree(build, ignore_errors=True)
+    build.mkdir()
+
+    header("Zipping Template")
+    archive = build / archive_name
+    manifest = write_archive(target, archive, ns.store_limit)
+
+    header("Zip File")
+    with zipfile.ZipFile(archive) as zf:
+        stored = [i for i in zf.infolist() if i.compress_type == zipfile.ZIP_STORED]
+        print(f"{len(zf.infolist())} entries, {len(stored)} stored uncompressed")
+    print(f"{archive.stat().st_size : >8} {str(archive)}")
+    print(f"sha256:{manifest['digest']}")
+
+    if ns.deploy.lower() in ("deploy", "yes", "y"):
+        header("Deploying Template")
+        deploy_path = Path(ns.deploy_path).expanduser()
+        deploy(archive, deploy_path)
+        dest = deploy_path / archive.name
+        print(f"{dest.stat().st_size : >8} {str(dest)}")
+
+
+if __name__ == "__main__":
+    main(parser.parse_args())
@@ -1,5 +1,7 @@
-from .init_cfg import init
 from .root import root
 
-# add sub-command functions here
-root.add_command(init)
+# add sub-commands here as name -> "module:attribute", modules are imported only
+# when their command is invoked (or listed by --help)
+root.add_lazy_command("init", ".init_cfg:init", __name__)
+root.add_lazy_command("schema", ".schema:schema_cmd", __name__)
+root.add_lazy_command("importtime", ".importtime:importtime", __name__)
@@ -0,0 +1,98 @@
+import subprocess
+import sys
+
+import click
+
+from . import utils
+
+MODULE = "{{ cookiecutter.project_module }}"
+
+
+def parse_importtime(output: str) -> list[dict]:
+    """modules from `python -X importtime` output, times in microseconds"""
+    modules: list[dict] = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3:
+            continue
+        name = fields[2].strip()
+        modules.append(
+            dict(
+                name=name,
+                package=name.split(".")[0],
+                self=int(fields[0]),
+                cumulative=int(fields[1]),
+            )
+        )
+    return modules
+
+
+@click.command(
+    name="importtime",
+    context_settings=dict(ignore_unknown_options=True, allow_interspersed_args=False),
+    help="""Report what an invocation of this app imports, and how long it takes.
+
+    Runs the app with `python -X importtime` and the given ARGS, then lists the
+    slowest modules and the time spent per top level package.
+
+    Example: importtime -- --show init""",
+)
+@click.option(
+    "--top",
+    "-t",
+    type=int,
+    default=20,
+    show_default=True,
+    help="Number of modules to list.",
+)
+@click.option(
+    "--sort",
+    type=click.Choice(["self", "cumulative"]),
+    default="self",
+    show_default=True,
+    help="Sort modules by their own or cumulative import time.",
+)
+@click.argument("args", nargs=-1, type=click.UNPROCESSED)
+@click.pass_context
+def importtime(ctx: click.Context, top, sort, args):
+    # importtime params
+    ctx.obj["importtime"] = dict(top=top, sort=sort, args=list(args))
+
+    # run show, exit on dry_run
+    utils.show(ctx)
+
+    cmd = [sys.executable, "-X", "importtime", "-m", MODULE, *args]
+    proc = subprocess.run(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True
+    )
+    modules = parse_importtime(proc.stderr)
+    if not modules:
+        raise click.ClickException(f"no import times reported by: {' '.join(cmd)}")
+
+    ours = [m for m in modules if m["package"] == MODULE]
+    total = sum(m["self"] for m in modules)
+    click.secho(
+        f"{len(modules)} modules imported in {total / 1000:.1f}ms, "
+        f"{len(ours)} from {MODULE} (exit code {proc.returncode})\n",
+        err=True,
+        fg="yellow",
+    )
+
+    click.echo(f"[ {'MODULE' : <40} ] {'SELF_MS' : >8} {'CUMUL_MS' : >8}")
+    click.echo("~" * 60)
+    for m in sorted(modules, key=lambda m: m[sort], reverse=True)[:top]:
+        self_ms, cumulative_ms = m["self"] / 1000, m["cumulative"] / 1000
+        click.echo(f"[ {m['name'] : <40} ] {self_ms : >8.1f} {cumulative_ms : >8.1f}")
+    click.echo()
+
+    packages: dict[str, int] = {}
+    for m in modules:
+        packages[m["package"]] = packages.get(m["package"], 0) + m["self"]
+
+    click.echo(f"[ {'PACKAGE' : <40} ] {'SELF_MS' : >8} {'MODULES' : >8}")
+    click.echo("~" * 60)
+    for package, us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]:
+        count = sum(1 for m in modules if m["package"] == package)
+        click.echo(f"[ {package : <40} ] {us / 1000 : >8.1f} {count : >8}")
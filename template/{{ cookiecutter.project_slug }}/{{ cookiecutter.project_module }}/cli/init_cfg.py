@@ -48,7 +48,8 @@ def init(ctx: click.Context, force, filename):
         config_path=path,
     )
 
-    # run show, exit on dry_run
+    # run show (resolves config when showing), exit on dry_run
+    # config isn't resolved otherwise, so a broken config file can be overwritten
     utils.show(ctx)
 
     # init config directory
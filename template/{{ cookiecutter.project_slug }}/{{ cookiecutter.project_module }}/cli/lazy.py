@@ -0,0 +1,50 @@
+import importlib
+import importlib.util
+from typing import Optional
+
+import click
+
+__all__ = ["LazyGroup"]
+
+
+class LazyGroup(click.Group):
+    """click group importing sub-commands only when they're invoked
+
+    sub-commands are registered by name with an import path, "module:attribute",
+    the module path may be relative to `package`:
+
+    ```
+    root.add_lazy_command("init", ".init_cfg:init", __name__)
+    ```
+
+    listing commands (ex. `--help`) still imports all of them, for their help text
+    """
+
+    def __init__(self, *args, lazy_commands: Optional[dict] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands: dict[str, str] = dict(lazy_commands or {})
+
+    def add_lazy_command(self, name: str, path: str, package: Optional[str] = None):
+        module, _, attr = path.partition(":")
+        if not attr:
+            raise ValueError(f"lazy command path must be 'module:attribute': {path}")
+        if module.startswith("."):
+            module = importlib.util.resolve_name(module, package)  # type: ignore
+        self.lazy_commands[name] = f"{module}:{attr}"
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str):
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            self.add_command(self._load(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def _load(self, cmd_name: str) -> click.Command:
+        module, _, attr = self.lazy_commands[cmd_name].partition(":")
+        cmd = getattr(importlib.import_module(module), attr)
+        if not isinstance(cmd, click.Command):
+            raise click.ClickException(
+                f"lazy command '{cmd_name}' is not a click command: {module}:{attr}"
+            )
+        return cmd
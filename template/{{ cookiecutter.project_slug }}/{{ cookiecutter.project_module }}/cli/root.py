@@ -5,10 +5,12 @@ import click
 
 from .. import config, logging
 from . import utils
+from .lazy import LazyGroup
 
 
 @click.group(
     name="{{ cookiecutter.project_slug }}",
+    cls=LazyGroup,
     invoke_without_command=True,
     context_settings=dict(help_option_names=["-h", "--help"]),
     help="",
@@ -41,6 +43,9 @@ def root(
        - `config_file` force configuration load from specified file only
        - `default` forces configuration load from internal values only
        - `config_dir` use configuration files from specified directory
+       - merged config is cached in `config_dir`, reparsed when a source changes
+       - config is resolved on first access (or `resolve()`), not for every command
+       - `typed_config` checked, attribute access config (see `config.typed`)
 
      * environment management
        - `env` value identifies which config files to load and merge for app config
@@ -70,11 +75,26 @@ def root(
         cmd=ctx.invoked_subcommand,
     )
 
-    # set config
-    ctx.obj["config_sources"] = config.source_list(
-        env.lower(), default, config_dir, config_file
-    )
-    ctx.obj["config"] = config.merge_configs(ctx.obj["config_sources"])
+    # set config, resolved on first access, sources are set once resolved
+    # merged result is cached under the config directory
+    def resolve_config() -> config.LayeredConfig:
+        sources = config.source_list(env.lower(), default, config_dir, config_file)
+        cache = config.cache_path(ctx.obj["root"]["config_dir"], sources)
+        ctx.obj["config_sources"] = sources
+        merged = config.merge_configs(sources, cache=cache)
+
+        # check and coerce values once, see config/typed.py
+        from ..config import typed
+
+        try:
+            ctx.obj["typed_config"] = typed.load(merged)
+        except config.ConfigError as e:
+            raise click.ClickException(str(e))
+        return merged
+
+    ctx.obj["config_sources"] = None
+    ctx.obj["typed_config"] = None
+    ctx.obj["config"] = config.LazyConfig(resolve_config)
 
     # configure logging, setup level, file logging, output options
     # options documented in logging module
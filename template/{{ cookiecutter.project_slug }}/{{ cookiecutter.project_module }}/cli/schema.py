@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import click
+
+from ..config import DEFAULT_CONFIG, schema
+from . import utils
+
+TYPED_CONFIG_FILE = Path(schema.__file__).parent / "typed.py"
+
+
+@click.command(
+    name="schema",
+    help=f"""Generate typed config classes from the internal config values.
+
+    Writes `__slots__` classes, one per config table, typed after each default
+    value. Run after changing DEFAULT_CONFIG in config/default.py.
+
+    Default file path:
+    {TYPED_CONFIG_FILE}""",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(file_okay=True, dir_okay=False, writable=True, resolve_path=True),
+    default=str(TYPED_CONFIG_FILE),
+    help="Generated module path.",
+)
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Exit with an error when the generated module is out of date, write nothing.",
+)
+@click.pass_context
+def schema_cmd(ctx: click.Context, output, check):
+    path = Path(output)
+
+    # schema params
+    ctx.obj["schema"] = dict(output=path, check=check)
+
+    # run show, exit on dry_run
+    utils.show(ctx)
+
+    try:
+        source = schema.generate(DEFAULT_CONFIG)
+    except schema.ConfigError as e:
+        raise click.ClickException(str(e))
+
+    current = path.read_text(encoding="utf8") if path.exists() else None
+    if current == source:
+        click.secho(f"typed config up to date at {path}", err=True, fg="yellow")
+        return
+
+    if check:
+        click.secho(f"typed config out of date at {path}", err=True, fg="red")
+        ctx.exit(1)
+
+    path.write_text(source, encoding="utf8")
+    click.secho(f"typed config written to {path}", err=True, fg="yellow")
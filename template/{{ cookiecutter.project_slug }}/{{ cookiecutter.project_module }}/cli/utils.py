@@ -1,5 +1,3 @@
-import json
-
 import click
 
 from .. import __version__, config
@@ -96,11 +94,39 @@ def root_params(fn):
     return fn
 
 
+def _json_default(o):
+    if isinstance(o, (config.LayeredConfig, config.LazyConfig)):
+        return o.to_dict()
+    return str(o)
+
+
+def resolve_config(ctx) -> config.LayeredConfig:
+    """resolve the lazy config set by the root command, returns it"""
+    if isinstance(ctx.obj["config"], config.LazyConfig):
+        return ctx.obj["config"].resolve()
+    return ctx.obj["config"]
+
+
+def typed_config(ctx):
+    """typed config, checked and coerced when the config is resolved"""
+    resolve_config(ctx)
+    return ctx.obj["typed_config"]
+
+
 def show(ctx, do_exit: bool = True):
     if ctx.obj["root"]["show"] or ctx.obj["root"]["dry_run"]:
+        import json
+
+        resolve_config(ctx)
+        # typed_config holds the same values as config
+        obj = {k: v for k, v in ctx.obj.items() if k != "typed_config"}
+        if isinstance(obj.get("config"), (config.LayeredConfig, config.LazyConfig)):
+            # which source each config value came from
+            obj = {**obj, "config_provenance": obj["config"].provenance()}
+
         output = json.dumps(
-            ctx.obj,
-            default=lambda o: str(o),
+            obj,
+            default=_json_default,
             sort_keys=True,
             indent=4,
         )
@@ -1,14 +1,17 @@
+import os
 from pathlib import Path
 from typing import Optional, Union, cast
 
-import pytomlpp
-
+from . import default
 from .default import DEFAULT_CONFIG
+from .layered import LayeredConfig, LazyConfig
 
 # fmt: off
 __all__ = [
     "DEFAULT_CONFIG", "DEFAULT_CONFIG_PATH", "DEFAULT_CONFIG_FILE",
-    "source_list", "merge_configs", "load_toml",
+    "CACHE_DIR", "ConfigError", "LayeredConfig", "LazyConfig",
+    "source_list", "merge_configs", "load_source", "load_toml",
+    "cache_path", "source_key", "read_cache", "write_cache",
     "init_config_file", "init_config_dir",
 ]
 
@@ -21,6 +24,16 @@ DEFAULT_CONFIG_PATH = (
 DEFAULT_CONFIG_FILE = Path("{{ cookiecutter.project_default_config_file }}")  # noqa: E501
 # fmt: on
 
+# compiled config cache, stored under the config directory
+CACHE_DIR = Path(".cache")
+CACHE_VERSION = 3
+
+SourceKey = tuple[str, int, int, str]
+
+
+class ConfigError(ValueError):
+    """a config value doesn't match the type of its default, see config.runtime"""
+
 
 def source_list(
     env: str, default: bool, config_dir: str, config_file: Optional[str]
@@ -44,19 +57,158 @@ def source_list(
     return output
 
 
-def merge_configs(sources: list[Union[Path, str]]) -> dict:
-    output: dict = {}
+def source_key(
+    source: Union[Path, str], previous: Optional[SourceKey] = None
+) -> SourceKey:
+    """cache key of a config source: path, mtime, size and content hash
 
-    for source in sources:
-        if source == "INTERNAL":
-            output = {**output, **DEFAULT_CONFIG}
-            continue
+    the "INTERNAL" source is keyed by the module holding DEFAULT_CONFIG. When
+    mtime and size match the `previous` key the file isn't read again.
+    """
+    import hashlib
+
+    path = Path(default.__file__) if source == "INTERNAL" else cast(Path, source)
+    stat = path.stat()
+    if previous is not None and previous[1:3] == (stat.st_mtime_ns, stat.st_size):
+        return previous
+
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    return (str(source), stat.st_mtime_ns, stat.st_size, digest)
+
+
+def cache_path(config_dir: Path, sources: list[Union[Path, str]]) -> Path:
+    """cache file for a source list, each env / config file gets its own"""
+    import hashlib
 
-        output = {**output, **load_toml(cast(Path, source))}
+    name = hashlib.sha256("\0".join(map(str, sources)).encode("utf8"))
+    return config_dir / CACHE_DIR / f"{name.hexdigest()[:16]}.json"
 
+
+def _cached_config(sources: list, layers: list) -> Optional[LayeredConfig]:
+    """config rebuilt from cached plain data, None when malformed"""
+    if not isinstance(sources, list) or not isinstance(layers, list):
+        return None
+    if len(sources) != len(layers):
+        return None
+
+    output_sources: list[Union[Path, str]] = []
+    output_layers: list[dict] = []
+    for source, layer in zip(sources, layers):
+        if source == "INTERNAL":
+            # internal defaults aren't stored, the cache key covers default.py
+            output_sources.append(source)
+            output_layers.append(DEFAULT_CONFIG)
+        elif isinstance(source, str) and isinstance(layer, dict):
+            output_sources.append(Path(source))
+            output_layers.append(layer)
+        else:
+            return None
+    return LayeredConfig(output_layers, output_sources)
+
+
+def read_cache(path: Path) -> Optional[dict]:
+    """cached entry, None when missing, unreadable, malformed or outdated
+
+    entries are plain json data, the config is rebuilt from its layers
+    """
+    import json
+
+    try:
+        with open(path, mode="rt", encoding="utf8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(entry, dict) or entry.get("version") != CACHE_VERSION:
+        return None
+
+    keys = entry.get("keys")
+    if not isinstance(keys, list) or not all(
+        isinstance(k, list) and len(k) == 4 for k in keys
+    ):
+        return None
+
+    config = _cached_config(entry.get("sources"), entry.get("layers"))
+    if config is None or len(keys) != len(config.sources):
+        return None
+    return dict(keys=[tuple(k) for k in keys], config=config)
+
+
+def write_cache(path: Path, keys: list[SourceKey], config: LayeredConfig):
+    """atomically replace the cache entry, skipped without a config directory
+
+    layers holding values json can't store (ex. toml dates) aren't cached
+    """
+    if not path.parent.parent.is_dir():
+        return
+
+    import json
+
+    entry = dict(
+        version=CACHE_VERSION,
+        keys=keys,
+        sources=[str(s) for s in config.sources],
+        layers=[
+            None if source == "INTERNAL" else layer
+            for source, layer in zip(config.sources, config.layers)
+        ],
+    )
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        content = json.dumps(entry, separators=(",", ":"))
+        path.parent.mkdir(exist_ok=True)
+        with open(tmp, mode="wt", encoding="utf8") as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError):
+        tmp.unlink(missing_ok=True)
+
+
+def merge_configs(
+    sources: list[Union[Path, str]], cache: Optional[Path] = None
+) -> LayeredConfig:
+    """deep-merged config view of all sources, later sources take precedence
+
+    with a `cache` file the parsed layers are reused while every source keeps
+    its path, mtime, size and content hash. Any change falls back to a full
+    parse, which then replaces the cache entry.
+    """
+    if cache is None or sources == ["INTERNAL"]:
+        return _merge_configs(sources)
+
+    entry = read_cache(cache)
+    cached: list = [] if entry is None else entry["keys"]
+    previous = dict((key[0], key) for key in cached)
+    try:
+        keys = [source_key(s, previous.get(str(s))) for s in sources]
+    except OSError:
+        return _merge_configs(sources)
+
+    # same paths with the same content hashes
+    if entry is not None and [(k[0], k[3]) for k in keys] == [
+        (k[0], k[3]) for k in cached
+    ]:
+        # content unchanged, only refresh the entry when a stat changed
+        if keys != cached:
+            write_cache(cache, keys, entry["config"])
+        return entry["config"]
+
+    output = _merge_configs(sources)
+    write_cache(cache, keys, output)
     return output
 
 
+def _merge_configs(sources: list[Union[Path, str]]) -> LayeredConfig:
+    return LayeredConfig([load_source(s) for s in sources], sources)
+
+
+def load_source(source: Union[Path, str]) -> dict:
+    if source == "INTERNAL":
+        return DEFAULT_CONFIG
+
+    return load_toml(cast(Path, source))
+
+
 def init_config_dir(config_dir: Path = DEFAULT_CONFIG_PATH) -> bool:
     if config_dir.exists() and not config_dir.is_dir():
         raise FileExistsError(
@@ -72,6 +224,8 @@ def init_config_dir(config_dir: Path = DEFAULT_CONFIG_PATH) -> bool:
 
 
 def init_config_file(path: Path, content: dict, force: bool = False) -> dict:
+    import pytomlpp
+
     if not path.exists() or (path.exists() and force):
         with open(file=path, mode="wt", encoding="utf8") as f:
             f.write(pytomlpp.dumps(content))
@@ -86,5 +240,8 @@ def init_config_file(path: Path, content: dict, force: bool = False) -> dict:
 
 
 def load_toml(path: Path) -> dict:
+    # imported on a cache miss only
+    import pytomlpp
+
     with open(path, mode="rt", encoding="utf8") as cfg:
         return pytomlpp.load(cfg)
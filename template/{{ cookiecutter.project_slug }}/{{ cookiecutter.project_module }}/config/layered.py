@@ -0,0 +1,167 @@
+"""
+Read-only, deep-merged view over a list of config layers, and a lazy proxy that
+builds one on first access.
+
+Layers are kept as parsed, lookups walk them from the last (highest priority)
+to the first. Nested tables are merged lazily: a table lookup returns another
+``LayeredConfig`` over the matching tables of every layer, sharing them instead
+of copying. A non-table value in a higher layer replaces whatever is below it.
+
+```
+cfg = LayeredConfig([{"db": {"host": "a", "port": 1}}, {"db": {"host": "b"}}],
+                    ["default.config.toml", "prod.config.toml"])
+cfg["db"]["port"]           # 1
+cfg.source("db", "host")    # "prod.config.toml"
+cfg.to_dict()               # {"db": {"host": "b", "port": 1}}
+```
+
+``LazyConfig`` wraps a function returning a ``LayeredConfig``, it's called once
+on the first lookup or ``resolve()`` call. Commands that never read config don't
+pay for finding, reading and parsing config files.
+"""
+
+import threading
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Sequence, Union
+
+__all__ = ["LayeredConfig", "LazyConfig"]
+
+Source = Union[Path, str]
+
+
+class LayeredConfig(Mapping):
+    __slots__ = ("_layers", "_sources")
+
+    def __init__(self, layers: Sequence[Mapping], sources: Sequence[Source]):
+        if len(layers) != len(sources):
+            raise ValueError("config layers and sources differ in length")
+        self._layers = tuple(layers)
+        self._sources = tuple(sources)
+
+    @property
+    def layers(self) -> tuple:
+        return self._layers
+
+    @property
+    def sources(self) -> tuple:
+        return self._sources
+
+    def _lookup(self, key: str) -> tuple[Any, Optional[Source]]:
+        """winning value of `key` and its source, tables merged over the layers"""
+        tables: list[Mapping] = []
+        sources: list[Source] = []
+        for layer, source in zip(reversed(self._layers), reversed(self._sources)):
+            if key not in layer:
+                continue
+            value = layer[key]
+            if not isinstance(value, Mapping):
+                if tables:
+                    # shadowed by the tables above it
+                    break
+                return value, source
+            tables.append(value)
+            sources.append(source)
+
+        if not tables:
+            raise KeyError(key)
+        if len(tables) == 1:
+            return LayeredConfig(tables, sources), sources[0]
+        tables.reverse()
+        sources.reverse()
+        return LayeredConfig(tables, sources), sources[-1]
+
+    def __getitem__(self, key: str) -> Any:
+        return self._lookup(key)[0]
+
+    def __iter__(self) -> Iterator[str]:
+        # first seen order, like merging the layers into a dict in order
+        return iter(dict.fromkeys(k for layer in self._layers for k in layer))
+
+    def __len__(self) -> int:
+        return len(set().union(*self._layers)) if self._layers else 0
+
+    def __contains__(self, key: object) -> bool:
+        return any(key in layer for layer in self._layers)
+
+    def __repr__(self) -> str:
+        return f"LayeredConfig({self.to_dict()!r})"
+
+    def source(self, *path: str) -> Optional[Source]:
+        """source of the winning value at `path`, for a table its highest layer"""
+        node: Any = self
+        source: Optional[Source] = None
+        for key in path:
+            if not isinstance(node, LayeredConfig):
+                raise KeyError(key)
+            node, source = node._lookup(key)
+        return source
+
+    def provenance(self, prefix: str = "") -> dict[str, Source]:
+        """source of every leaf value, keyed by its dotted path"""
+        output: dict[str, Source] = {}
+        for key in self:
+            value, source = self._lookup(key)
+            if isinstance(value, LayeredConfig) and len(value):
+                output.update(value.provenance(f"{prefix}{key}."))
+            else:
+                output[f"{prefix}{key}"] = source  # type: ignore
+        return output
+
+    def replace(self, index: int, layer: Mapping) -> "LayeredConfig":
+        """new view with one layer swapped, all other layers are shared"""
+        layers = list(self._layers)
+        layers[index] = layer
+        return LayeredConfig(layers, self._sources)
+
+    def to_dict(self) -> dict:
+        """materialize as plain nested dicts"""
+        output: dict = {}
+        for key in self:
+            value = self[key]
+            output[key] = value.to_dict() if isinstance(value, LayeredConfig) else value
+        return output
+
+
+class LazyConfig(Mapping):
+    __slots__ = ("_resolve", "_config", "_lock")
+
+    def __init__(self, resolve: Callable[[], LayeredConfig]):
+        self._resolve = resolve
+        self._config: Optional[LayeredConfig] = None
+        self._lock = threading.Lock()
+
+    @property
+    def resolved(self) -> bool:
+        return self._config is not None
+
+    def resolve(self) -> LayeredConfig:
+        """resolved config, resolving it on the first call"""
+        if self._config is None:
+            with self._lock:
+                if self._config is None:
+                    self._config = self._resolve()
+        return self._config
+
+    def __getitem__(self, key: str) -> Any:
+        return self.resolve()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.resolve())
+
+    def __len__(self) -> int:
+        return len(self.resolve())
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.resolve()
+
+    def __getattr__(self, name: str) -> Any:
+        # LayeredConfig methods (source, provenance, to_dict, ...)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        if self._config is None:
+            return "LazyConfig(<unresolved>)"
+        return f"LazyConfig({self._config.to_dict()!r})"
@@ -0,0 +1,137 @@
+"""
+Runtime helpers of the typed config classes in ``config/typed.py``.
+
+Kept apart from the generator (``config/schema.py``) so loading a typed config
+imports only this module, not the code generating it.
+"""
+
+from collections.abc import Mapping
+from typing import Any, Optional
+
+from . import ConfigError
+
+__all__ = ["TypedConfig", "coerce", "table"]
+
+_missing = object()
+_bool_strings = {
+    "true": True,
+    "yes": True,
+    "1": True,
+    "false": False,
+    "no": False,
+    "0": False,
+}
+
+
+class TypedConfig:
+    """base of the generated classes, `_keys` maps attributes to config keys"""
+
+    __slots__ = ()
+
+    _keys: dict = {}
+
+    def to_dict(self) -> dict:
+        output: dict = {}
+        for attr, key in self._keys.items():
+            value = getattr(self, attr)
+            output[key] = value.to_dict() if isinstance(value, TypedConfig) else value
+        return output
+
+    def __eq__(self, other: object) -> bool:
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _to_bool(value: Any) -> Any:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in _bool_strings:
+        return _bool_strings[value.lower()]
+    return _missing
+
+
+def _to_kind(value: Any, kind: type) -> Any:
+    """`value` converted to a non bool `kind`, _missing when it can't be"""
+    if kind is int and isinstance(value, float) and value.is_integer():
+        return int(value)
+    if kind is float and isinstance(value, int):
+        return float(value)
+    if kind is str and isinstance(value, (int, float)):
+        return str(value)
+    if not isinstance(value, str):
+        return _missing
+
+    try:
+        if kind in (int, float):
+            return kind(value.strip())
+        if hasattr(kind, "fromisoformat"):
+            return kind.fromisoformat(value)  # type: ignore
+    except ValueError:
+        pass
+    return _missing
+
+
+def _convert(value: Any, kind: type, path: str) -> Any:
+    if kind is bool:
+        output = _to_bool(value)
+    elif isinstance(value, bool):
+        # bool is an int, never coerce it to a number or string
+        output = _missing
+    elif isinstance(value, kind):
+        return value
+    else:
+        output = _to_kind(value, kind)
+
+    if output is _missing:
+        raise ConfigError(
+            f"config value '{path}' expected {kind.__name__}, "
+            f"got {type(value).__name__} {value!r}"
+        )
+    return output
+
+
+def coerce(
+    data: Mapping,
+    key: str,
+    kind: Optional[type],
+    path: str,
+    default: Any,
+    item: Optional[type] = None,
+) -> Any:
+    """value of `key` checked and coerced to `kind`, `default` when missing
+
+    lists are checked item by item against `item`, `kind` None accepts anything
+    """
+    value = data.get(key, _missing)
+    if value is _missing:
+        return list(default) if isinstance(default, list) else default
+
+    if kind is None:
+        return value
+    if kind is list:
+        if not isinstance(value, (list, tuple)):
+            raise ConfigError(
+                f"config value '{path}{key}' expected list, "
+                f"got {type(value).__name__} {value!r}"
+            )
+        if item is None:
+            return list(value)
+        return [_convert(v, item, f"{path}{key}[{i}]") for i, v in enumerate(value)]
+    return _convert(value, kind, f"{path}{key}")
+
+
+def table(data: Mapping, key: str, path: str) -> Mapping:
+    """nested table of `key`, empty when missing so its defaults are used"""
+    value = data.get(key, _missing)
+    if value is _missing:
+        return {}
+    if not isinstance(value, Mapping):
+        raise ConfigError(
+            f"config value '{path}{key}' expected table, "
+            f"got {type(value).__name__} {value!r}"
+        )
+    return value
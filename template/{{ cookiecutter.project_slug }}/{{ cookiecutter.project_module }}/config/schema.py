@@ -0,0 +1,168 @@
+"""
+Typed config classes generated from ``DEFAULT_CONFIG``.
+
+``generate`` writes the source of a ``__slots__`` class per config table, with a
+typed attribute per key. The type of each attribute is taken from its default
+value. Loading a config through the generated classes (``typed.load(config)``)
+checks and coerces every value once, then values are plain attribute reads.
+
+```
+DEFAULT_CONFIG = {"workers": 4, "db": {"host": "localhost", "port": 5432}}
+
+cfg = typed.load(ctx.obj["config"])
+cfg.db.port     # 5432, an int even when the config file has "5432"
+```
+
+Keys missing from the loaded config fall back to their default, keys that aren't
+in ``DEFAULT_CONFIG`` are ignored. Values that can't be coerced raise a
+``ConfigError`` naming the key. Regenerate ``config/typed.py`` with the
+``schema`` command after changing ``config/default.py``. The generated classes
+import their helpers from ``config/runtime.py``, not from this module.
+"""
+
+import datetime
+import keyword
+import re
+from collections.abc import Mapping
+from typing import Any, Optional
+
+from . import ConfigError
+
+__all__ = ["ConfigError", "generate"]
+
+# scalar types of default values, most specific first
+_scalar_types: list[type] = [
+    bool,
+    int,
+    float,
+    str,
+    datetime.datetime,
+    datetime.date,
+    datetime.time,
+]
+
+
+def _kind(value: Any) -> Optional[type]:
+    for kind in _scalar_types:
+        if isinstance(value, kind):
+            return kind
+    return None
+
+
+def _item_kind(value: list) -> Optional[type]:
+    """type of every item of a list, None when empty or mixed"""
+    kinds = set(_kind(v) for v in value)
+    if len(kinds) == 1:
+        return kinds.pop()
+    return None
+
+
+def _type_name(kind: Optional[type]) -> str:
+    if kind is None:
+        return "Any"
+    if kind.__module__ == "datetime":
+        return f"datetime.{kind.__name__}"
+    return kind.__name__
+
+
+def _attr_name(key: str) -> str:
+    name = re.sub(r"\W", "_", key)
+    if not name or name[0].isdigit():
+        name = f"_{name}"
+    if keyword.iskeyword(name) or name in ("to_dict", "_keys"):
+        name = f"{name}_"
+    return name
+
+
+def _class_name(parent: str, key: str, taken: set[str]) -> str:
+    name = parent + "".join(p.capitalize() for p in re.split(r"[\W_]+", key) if p)
+    if name == parent:
+        name = f"{parent}Table"
+    base, i = name, 2
+    while name in taken:
+        name, i = f"{base}{i}", i + 1
+    taken.add(name)
+    return name
+
+
+def _generate_class(
+    data: Mapping, name: str, path: str, classes: list[str], taken: set[str]
+):
+    attrs: dict[str, str] = {}
+    annotations: list[str] = []
+    body: list[str] = []
+    for key, value in data.items():
+        if not isinstance(key, str):
+            raise ConfigError(f"config key {key!r} at '{path}' isn't a string")
+
+        attr = _attr_name(key)
+        if attr in attrs:
+            raise ConfigError(
+                f"config keys {attrs[attr]!r} and {key!r} at '{path}' "
+                f"both map to attribute '{attr}'"
+            )
+        attrs[attr] = key
+
+        if isinstance(value, Mapping):
+            nested = _class_name(name, key, taken)
+            _generate_class(value, nested, f"{path}{key}.", classes, taken)
+            annotations.append(f"    {attr}: {nested}")
+            body.append(
+                f"        self.{attr} = {nested}("
+                f"table(data, {key!r}, path), path + {key + '.'!r})"
+            )
+            continue
+
+        if isinstance(value, list):
+            item = _item_kind(value)
+            annotations.append(f"    {attr}: list[{_type_name(item)}]")
+            args = f"list, path, {value!r}, {_type_name(item)}"
+            if item is None:
+                args = f"list, path, {value!r}"
+        else:
+            kind = _kind(value)
+            annotations.append(f"    {attr}: {_type_name(kind)}")
+            args = f"{_type_name(kind) if kind else None}, path, {value!r}"
+        body.append(f"        self.{attr} = coerce(data, {key!r}, {args})")
+
+    slots = "".join(f"{a!r}, " for a in attrs)
+    lines = [f"class {name}(TypedConfig):", f"    __slots__ = ({slots.rstrip()})", ""]
+    lines += annotations + [""] if annotations else []
+    lines.append(f"    _keys = {attrs!r}")
+    lines.append("")
+    lines.append('    def __init__(self, data: Mapping, path: str = ""):')
+    lines += body or ["        pass"]
+    classes.append("\n".join(lines))
+
+
+def generate(config: Mapping, name: str = "Config") -> str:
+    """python source of the typed classes for `config`, `name` is the root class"""
+    classes: list[str] = []
+    _generate_class(config, name, "", classes, {name})
+
+    return "\n".join(
+        [
+            '"""',
+            "Typed config classes, generated from config/default.py by the `schema`",
+            "command. Don't edit, regenerate after changing DEFAULT_CONFIG.",
+            '"""',
+            "# flake8: noqa",
+            "# fmt: off",
+            "",
+            "import datetime",
+            "from typing import Any, Mapping",
+            "",
+            "from .runtime import TypedConfig, coerce, table",
+            "",
+            f'__all__ = ["{name}", "load"]',
+            "",
+            "",
+            "\n\n\n".join(classes),
+            "",
+            "",
+            f"def load(data: Mapping) -> {name}:",
+            '    """check and coerce a loaded config"""',
+            f"    return {name}(data)",
+            "",
+        ]
+    )
@@ -0,0 +1,29 @@
+"""
+Typed config classes, generated from config/default.py by the `schema`
+command. Don't edit, regenerate after changing DEFAULT_CONFIG.
+"""
+# flake8: noqa
+# fmt: off
+
+import datetime
+from typing import Any, Mapping
+
+from .runtime import TypedConfig, coerce, table
+
+__all__ = ["Config", "load"]
+
+
+class Config(TypedConfig):
+    __slots__ = ('foo',)
+
+    foo: str
+
+    _keys = {'foo': 'foo'}
+
+    def __init__(self, data: Mapping, path: str = ""):
+        self.foo = coerce(data, 'foo', str, path, 'bar')
+
+
+def load(data: Mapping) -> Config:
+    """check and coerce a loaded config"""
+    return Config(data)
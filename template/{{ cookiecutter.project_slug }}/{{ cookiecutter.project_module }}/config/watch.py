@@ -0,0 +1,353 @@
+"""
+Live config reload for long-running apps.
+
+``ConfigWatcher`` follows the files returned by ``source_list`` and swaps in a
+new ``LayeredConfig`` when one of them changes, along with its typed config
+(``typed.load``). Only the changed layer is read and parsed again, unchanged
+layers are shared with the previous config. On Linux
+changes are picked up with inotify, elsewhere (or when inotify is unavailable)
+the files are polled with ``os.stat`` every ``interval`` seconds.
+
+```
+watcher = ConfigWatcher.from_root(ctx.obj["root"], ctx.obj["config"])
+watcher.subscribe(lambda config, previous, typed: log.info("config reloaded"))
+
+with watcher:
+    while True:
+        work(watcher.typed_config)
+```
+
+A change only counts when a file's content hash changed, touching a file or
+rewriting it with the same content is ignored. When a file doesn't parse (ex.
+an editor saved it halfway) or a value doesn't match its type, the current
+config is kept until the next change. ``ctx.obj["typed_config"]`` is built once
+per invocation, long-running apps read ``watcher.typed_config`` instead.
+"""
+
+import ctypes
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from ..logging import getCliLogger
+from . import ConfigError, load_source, source_key, source_list, typed
+from .layered import LayeredConfig, LazyConfig
+
+__all__ = ["ConfigWatcher", "InotifyBackend", "PollingBackend"]
+
+Subscriber = Callable[[LayeredConfig, LayeredConfig, typed.Config], None]
+
+# wait this long for a burst of events (ex. editor save) to settle
+_debounce: float = 0.05
+
+
+class PollingBackend:
+    """stat every watched file each interval, reports a change in any of them"""
+
+    name = "polling"
+
+    def __init__(self, paths: list[Path], stop: threading.Event):
+        self._paths = paths
+        self._stop = stop
+        self._stats = self._stat()
+
+    def _stat(self) -> list[Optional[tuple[int, int, int]]]:
+        output: list[Optional[tuple[int, int, int]]] = []
+        for path in self._paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                output.append(None)
+                continue
+            output.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        return output
+
+    def wait(self, timeout: float) -> bool:
+        if self._stop.wait(timeout):
+            return False
+
+        stats = self._stat()
+        changed = stats != self._stats
+        self._stats = stats
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyBackend:
+    """inotify watches on the directories holding the watched files
+
+    directories are watched instead of files, so files replaced by rename (how
+    most editors save) or created later (ex. a new env file) are seen too
+    """
+
+    name = "inotify"
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = 0o2000000
+
+    _mask = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    _event = struct.Struct("iIII")
+
+    def __init__(self, paths: list[Path], stop: threading.Event):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on linux")
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available in libc")
+
+        self._stop = stop
+        self._names = set(p.name for p in paths)
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        for directory in set(p.parent for p in paths):
+            wd = libc.inotify_add_watch(
+                self._fd, os.fsencode(directory), ctypes.c_uint32(self._mask)
+            )
+            if wd < 0:
+                errno = ctypes.get_errno()
+                self.close()
+                raise OSError(errno, "inotify_add_watch failed", str(directory))
+
+    def _read(self) -> set[str]:
+        """names of the files in the pending events"""
+        names: set[str] = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return names
+
+        offset = 0
+        while offset + self._event.size <= len(data):
+            _, _, _, length = self._event.unpack_from(data, offset)
+            offset += self._event.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            names.add(os.fsdecode(name))
+            offset += length
+        return names
+
+    def wait(self, timeout: float) -> bool:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready or self._stop.is_set():
+            return False
+
+        names = self._read()
+        while select.select([self._fd], [], [], _debounce)[0]:
+            names |= self._read()
+        return bool(names & self._names)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class ConfigWatcher:
+    """keeps `config` and `typed_config` in sync with their source files
+
+    :param env: environment name, as passed to ``source_list``
+    :param default: use internal config only, nothing is watched
+    :param config_dir: config directory, as passed to ``source_list``
+    :param config_file: load only this file, as passed to ``source_list``
+    :param config: current config, its unchanged layers are reused
+    :param interval: polling interval, also the most ``stop`` waits for the thread
+    :param polling: use the polling backend even when inotify is available
+    """
+
+    def __init__(
+        self,
+        env: str,
+        default: bool,
+        config_dir: Union[Path, str],
+        config_file: Optional[str] = None,
+        config: Optional[Union[LayeredConfig, LazyConfig]] = None,
+        interval: float = 1.0,
+        polling: bool = False,
+    ):
+        self.env = env.lower()
+        self.default = default
+        self.config_dir = Path(config_dir).expanduser().resolve()
+        self.config_file = config_file
+        self.interval = interval
+        self.polling = polling
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._subscribers: list[Subscriber] = []
+        self._log = getCliLogger("config.watch")
+
+        if isinstance(config, LazyConfig):
+            config = config.resolve()
+        sources = self._sources()
+        if config is None or list(config.sources) != sources:
+            config = LayeredConfig([load_source(s) for s in sources], sources)
+        self._config = config
+        self._typed_config = typed.load(config)
+        self._keys = dict((str(s), source_key(s)) for s in sources)
+
+    @classmethod
+    def from_root(
+        cls,
+        root: dict,
+        config: Optional[Union[LayeredConfig, LazyConfig]] = None,
+        **kwargs,
+    ) -> "ConfigWatcher":
+        """watcher for the config selected by the root command's params"""
+        return cls(
+            root["env"],
+            root["force_default"],
+            root["config_dir"],
+            root["force_config_file"],
+            config=config,
+            **kwargs,
+        )
+
+    @property
+    def config(self) -> LayeredConfig:
+        return self._config
+
+    @property
+    def typed_config(self) -> typed.Config:
+        """typed config of `config`, rebuilt on every reload"""
+        return self._typed_config
+
+    def _sources(self) -> list[Union[Path, str]]:
+        return source_list(
+            self.env, self.default, str(self.config_dir), self.config_file
+        )
+
+    def paths(self) -> list[Path]:
+        """every file that can be a config source, existing or not"""
+        if self.default:
+            return []
+        if self.config_file is not None:
+            return [Path(self.config_file).expanduser().resolve()]
+
+        paths = [self.config_dir / "default.config.toml"]
+        if self.env != "default":
+            paths.append(self.config_dir / f"{self.env}.config.toml")
+        return paths
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """call `callback(config, previous, typed_config)` after every reload
+
+        returns a function that removes the subscription
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+        return lambda: self.unsubscribe(callback)
+
+    def unsubscribe(self, callback: Subscriber):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def refresh(self) -> bool:
+        """reload changed sources, returns True when the config was swapped"""
+        with self._lock:
+            previous = self._config
+            old_keys = self._keys
+        sources = self._sources()
+        layers = dict(zip(map(str, previous.sources), previous.layers))
+
+        keys = {}
+        new_layers = []
+        try:
+            for source in sources:
+                old = old_keys.get(str(source))
+                keys[str(source)] = key = source_key(source, old)
+                if old is not None and old[3] == key[3] and str(source) in layers:
+                    new_layers.append(layers[str(source)])
+                else:
+                    new_layers.append(load_source(source))
+        except Exception as e:
+            # removed or half written, wait for the next change
+            self._log.warning(f"config not reloaded, {type(e).__name__}: {e}")
+            return False
+
+        if sources == list(previous.sources) and all(
+            a is b for a, b in zip(new_layers, previous.layers)
+        ):
+            with self._lock:
+                self._keys = keys
+            return False
+
+        config = LayeredConfig(new_layers, sources)
+        try:
+            typed_config = typed.load(config)
+        except ConfigError as e:
+            # keys not updated, the same content is checked again when it changes
+            self._log.warning(f"config not reloaded, {e}")
+            return False
+
+        with self._lock:
+            self._keys = keys
+            self._config = config
+            self._typed_config = typed_config
+            subscribers = list(self._subscribers)
+
+        self._log.info(f"config reloaded from {', '.join(map(str, sources))}")
+        for callback in subscribers:
+            try:
+                callback(config, previous, typed_config)
+            except Exception:
+                self._log.exception("config subscriber failed")
+        return True
+
+    def _backend(self) -> Union[InotifyBackend, PollingBackend]:
+        paths = self.paths()
+        if not self.polling:
+            try:
+                return InotifyBackend(paths, self._stop)
+            except OSError as e:
+                self._log.debug(f"inotify unavailable, polling instead: {e}")
+        return PollingBackend(paths, self._stop)
+
+    def _run(self, backend: Union[InotifyBackend, PollingBackend]):
+        try:
+            while not self._stop.is_set():
+                if backend.wait(self.interval):
+                    self.refresh()
+        finally:
+            backend.close()
+
+    def start(self) -> "ConfigWatcher":
+        """watch for changes in a daemon thread"""
+        if self._thread is not None or self.default:
+            return self
+
+        self._stop.clear()
+        backend = self._backend()
+        self._log.debug(f"watching config with {backend.name}")
+        self._thread = threading.Thread(
+            target=self._run, args=(backend,), name="config-watch", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> "ConfigWatcher":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -25,16 +25,17 @@ Derived classes ``CliLogHandler`` and ``CliLogFormatter`` are also available to
 add click integrated functionality to your own existing loggers.
 """
 
-import json
 import logging
 from datetime import datetime
 from logging import CRITICAL, DEBUG, ERROR, INFO, WARNING  # noqa: F401
-from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import Iterable, Optional, Union, cast
+from typing import TYPE_CHECKING, Iterable, Optional, Union, cast
 
 import click
 
+if TYPE_CHECKING:
+    from logging.handlers import RotatingFileHandler
+
 # fmt: off
 __all__ = [
     "_default_root_name", "_default_timestamp_format", "_default_logger",
@@ -49,7 +50,7 @@ _default_root_name: str = "{{ cookiecutter.project_slug }}"
 _default_timestamp_format: str = "%Y-%m-%d %H:%M:%S"
 _default_logger: Optional[logging.Logger] = None
 _default_cli_handler: Optional[logging.Handler] = None
-_default_file_handler: Optional[RotatingFileHandler] = None
+_default_file_handler: Optional["RotatingFileHandler"] = None
 
 
 def _reset_logging(root_name: str):
@@ -180,6 +181,8 @@ def configRootLogger(
 
     # init file handler and attach logger when given filename
     if file_handler_kwargs.get("filename") is not None:
+        from logging.handlers import RotatingFileHandler
+
         kwargs = {
             **{"maxBytes": 10000000, "backupCount": 5, "encoding": "utf8"},
             **file_handler_kwargs,
@@ -380,6 +383,8 @@ class CliLogFormatter(logging.Formatter):
         line: list[str] = []
         # handle different logged msg types
         if isinstance(record.msg, dict) and not self.disable_dict_to_json:
+            import json
+
             if self.pretty_print_json:
                 line.append(json.dumps(record.msg, default=lambda o: str(o), indent=4))
             else: